@@ -2,7 +2,7 @@
 """
 
 from packages.db.db_mana import DBMana
-from packages.similarity.process_tools import ProcessSimilarity
+from packages.similarity import registry
 
 def get_db_tool():
     "Setup and return of dbtools (with simitool)"
@@ -12,9 +12,7 @@ def get_db_tool():
     db_tool.setup_db_tools()
 
     # // For query->siminet conversion.
-    simitool = ProcessSimilarity()
-    simitool.load_model()
-    db_tool.simitool = simitool
+    db_tool.simitool = registry.get_simitool()
 
     print("Setup done.")
     return db_tool
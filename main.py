@@ -2,6 +2,8 @@ import sys
 import packages.dataset_tools.generate_dataset as gen_da
 from packages.dataset_tools.scale_dataset import split_dataset_by_obj_count as splt_da
 from packages.pipes import prefabs
+from packages.similarity.process_tools import ProcessSimilarity
+from packages.similarity.neighbour_table import build_neighbour_table
 
 
 
@@ -19,10 +21,22 @@ def print_help():
                 '-getdataset' (more) specify dataset download
                 '-scaledataset' () specify dataset scale
 
+            model:
+                '-buildtable' (more) precompute w2v neighbour table
+
             more:
                 '-track=word1,word2,wordN' specifies API track
                 '-path=./...' specifies file location of dataset
                 '-query=word1,word2,wordN' query for frontend. 
+                '-runtime=serial' pipeline runtime, 'serial' (default),
+                    'threaded' (one thread per pipe) or 'multiprocess'
+                    (cleaning and siminets in worker processes)
+                '-batch=INT' max tweets cleaned at once (default 1);
+                    fills up with '-runtime=threaded'
+                '-workers=INT' cleaning worker processes (default 0),
+                    needs '-batch=' above 1, not with multiprocess
+                '-alphaonly' use the w2v model without non-alpha words
+                '-maxvocab=INT' use the w2v model cut to INT words
 
                 '-ttime=INT' Specify total time for getdataset
                 '-stime=INT' Specify slice time for getdataset
@@ -30,6 +44,8 @@ def print_help():
                 '-sdiv=INT' Specify division count for scale dataset
                 '-sin=' Specify input for scale dataset (file)
                 '-sout=' Specify output for scale dataset (dir)
+
+                '-table=' Specify neighbour table location (prefix)
                 
 
             Examples:
@@ -37,11 +53,16 @@ def print_help():
                 -pipe=api2db -track=to,and,from
                 -pipe=dsk2js -path=./.. -query=help,me
                 -pipe=api2js -track=to,and,from -query=help,me
+                -pipe=api2db -track=to,and,from -runtime=threaded
+                -pipe=dsk2db -path=./... -runtime=threaded -batch=64 -workers=2
+                -pipe=dsk2db -path=./... -alphaonly -maxvocab=200000
 
                 -getdataset -ttime=10 -stime=10 -track=virus -path=./
                 -scaledataset -sdiv=2 -sin=.. -sout=..
                 -scaledataset -sdiv=2 -sin=./... -sout=./
 
+                -buildtable -table=./tables/glove-twitter-25
+
     """)
 
 
@@ -64,6 +85,9 @@ def cmd_pt1(cmd):
     elif "-scaledataset" in cmd:
         start_scale_dataset(cmd)
 
+    elif "-buildtable" in cmd:
+        start_build_table(cmd)
+
     else:
         print("command not found")
         print_help()
@@ -102,6 +126,42 @@ def cmd_pt2_query(cmd):
     if parsed: return parsed.split(",")
     else: return None
 
+def cmd_pt2_runtime(cmd):
+    # // Optional, so check before parsing (which reports missing args).
+    if "-runtime=" not in cmd: return "serial"
+    parsed = parse_from_to_ws(cmd, "-runtime=")
+    if parsed in prefabs.RUNTIMES: return parsed
+    else: return None
+
+def cmd_pt2_optional_int(cmd, from_str, default):
+    # // Optional, so check before parsing (which reports missing args).
+    if from_str not in cmd: return default
+    parsed = parse_from_to_ws(cmd, from_str)
+    try:
+        return int(parsed)
+    except:
+        return None
+
+def cmd_pt2_batch_size(cmd):
+    parsed = cmd_pt2_optional_int(cmd, "-batch=", 1)
+    if parsed and parsed > 0: return parsed
+    else: return None
+
+def cmd_pt2_workers(cmd):
+    parsed = cmd_pt2_optional_int(cmd, "-workers=", 0)
+    if parsed is not None and parsed >= 0: return parsed
+    else: return None
+
+def cmd_pt2_alpha_only(cmd):
+    return "-alphaonly" in cmd.split()
+
+def cmd_pt2_max_vocab(cmd):
+    # // None means no cap, so 0 signals an error.
+    if "-maxvocab=" not in cmd: return None
+    parsed = cmd_pt2_optional_int(cmd, "-maxvocab=", None)
+    if parsed and parsed > 0: return parsed
+    else: return 0
+
 def cmd_pt2_gd_time(cmd):
     parsed = parse_from_to_ws(cmd, "-ttime=")
     if parsed: 
@@ -135,32 +195,53 @@ def cmd_pt2_gs_split_out(cmd):
 def cmd_pt2_gs_split_in(cmd):
     return parse_from_to_ws(cmd, "-sin=")
 
+def cmd_pt2_table(cmd):
+    return parse_from_to_ws(cmd, "-table=")
+
 
 
 
 def start_dsk2db(cmd):
+    runtime = cmd_pt2_runtime(cmd)
+    batch_size = cmd_pt2_batch_size(cmd)
+    workers = cmd_pt2_workers(cmd)
+    max_vocab = cmd_pt2_max_vocab(cmd)
     path = cmd_pt2_path(cmd)
-    if not path: 
+    if not runtime or not batch_size or workers is None or max_vocab == 0 or not path: 
         print('command error')
         print_help()
         return
 
     print("Starting pipeline dsk->db.")
     prefabs.get_pipeline_dsk_cln_simi_db(
-        filepath=path
+        filepath=path,
+        runtime=runtime,
+        batch_size=batch_size,
+        workers=workers,
+        alpha_only=cmd_pt2_alpha_only(cmd),
+        max_vocab=max_vocab
     ).run()
 
 
 def start_api2db(cmd):
+    runtime = cmd_pt2_runtime(cmd)
+    batch_size = cmd_pt2_batch_size(cmd)
+    workers = cmd_pt2_workers(cmd)
+    max_vocab = cmd_pt2_max_vocab(cmd)
     track = cmd_pt2_track(cmd)
-    if not track: 
+    if not runtime or not batch_size or workers is None or max_vocab == 0 or not track: 
         print('command error')
         print_help()
         return
 
     print("Starting pipeline api->db")
     prefabs.get_pipeline_api_cln_simi_db(
-        api_track=track
+        api_track=track,
+        runtime=runtime,
+        batch_size=batch_size,
+        workers=workers,
+        alpha_only=cmd_pt2_alpha_only(cmd),
+        max_vocab=max_vocab
     ).run()
 
 
@@ -204,10 +285,27 @@ def start_scale_dataset(cmd):
     
 
 
+def start_build_table(cmd):
+    path = cmd_pt2_table(cmd)
+    if not path:
+        print('command error')
+        print_help()
+        return
+
+    print(f"Building neighbour table: {path}")
+    simitool = ProcessSimilarity(verbosity=True)
+    simitool.load_model()
+    build_neighbour_table(simitool=simitool, path=path)
+
+
 def start_dsk2js(cmd):
+    runtime = cmd_pt2_runtime(cmd)
+    batch_size = cmd_pt2_batch_size(cmd)
+    workers = cmd_pt2_workers(cmd)
+    max_vocab = cmd_pt2_max_vocab(cmd)
     path = cmd_pt2_path(cmd)
     query = cmd_pt2_query(cmd)
-    if not path or not query: 
+    if not runtime or not batch_size or workers is None or max_vocab == 0 or not path or not query: 
         print('command error')
         print_help()
         return
@@ -215,14 +313,23 @@ def start_dsk2js(cmd):
     print("Starting pipeline dsk->js")
     prefabs.get_pipeline_dsk_cln_simi_js(
         filepath=path,
-        initial_query=query
-    )
+        initial_query=query,
+        runtime=runtime,
+        batch_size=batch_size,
+        workers=workers,
+        alpha_only=cmd_pt2_alpha_only(cmd),
+        max_vocab=max_vocab
+    ).run()
 
 
 def start_api2js(cmd):
+    runtime = cmd_pt2_runtime(cmd)
+    batch_size = cmd_pt2_batch_size(cmd)
+    workers = cmd_pt2_workers(cmd)
+    max_vocab = cmd_pt2_max_vocab(cmd)
     track = cmd_pt2_track(cmd)
     query = cmd_pt2_query(cmd)
-    if not track or not query:
+    if not runtime or not batch_size or workers is None or max_vocab == 0 or not track or not query:
         print('command error')
         print_help()
         return
@@ -230,7 +337,12 @@ def start_api2js(cmd):
     print("Starting pipeline api->js")
     prefabs.get_pipeline_api_cln_simi_js(
         api_track=track,
-        initial_query=query
+        initial_query=query,
+        runtime=runtime,
+        batch_size=batch_size,
+        workers=workers,
+        alpha_only=cmd_pt2_alpha_only(cmd),
+        max_vocab=max_vocab
     ).run()
 
 
@@ -0,0 +1,129 @@
+import sys
+import copy
+import time
+import random
+
+from packages.cleaning.basic_cleaner import BasicCleaner
+from packages.cleaning.data_object import DataObj
+
+""" Throughput benchmark of tweet cleaning
+    (packages.cleaning.basic_cleaner), comparing:
+        - autocleaner: one pass per cleaning step.
+        - autocleaner_single_pass: one pass over the words.
+    Both must give the exact same dataobjects, which is checked.
+    Tweets are synthetic (words, links, tags, punctuation, digits,
+    mixed case, non-latin letters), so no dataset is needed.
+
+    Run from the project root:
+        python -m packages.benchmark.cleaning [tweet_count]
+"""
+
+def get_random_tweets(count:int, seed:int = 0) -> list:
+    "Returns 'count' DataObj with synthetic tweet text and name."
+    rng = random.Random(seed)
+    vocabulary = [
+        "the", "and", "to", "rt", "I", "you", "don't", "python", "Noodle",
+        "twitter", "graph", "coffee", "rain", "happy", "terrible", "great",
+        "news", "today", "week", "café", "Ωmega", "straße", "hello!!",
+        "what?", "e.g.", "3pm", "2day", "l8r", "...", "-", "&amp;", "😀",
+    ]
+    specials = [
+        lambda: f"#{rng.choice(vocabulary)}",
+        lambda: f"@{rng.choice(vocabulary)}_{rng.randint(0, 99)}",
+        lambda: f"https://t.co/{rng.randint(10 ** 5, 10 ** 6)}",
+        lambda: f"{rng.choice(vocabulary)}.{rng.choice(vocabulary)}",
+        lambda: f"{rng.choice(vocabulary)}@{rng.choice(vocabulary)}#x",
+        lambda: rng.choice(vocabulary).upper(),
+    ]
+    tweets = []
+    for index in range(count):
+        words = []
+        for _ in range(rng.randint(5, 30)):
+            if rng.random() < 0.2: words.append(rng.choice(specials)())
+            else: words.append(rng.choice(vocabulary))
+        obj = DataObj()
+        obj.unique_id = str(index)
+        obj.name = f"User {rng.choice(vocabulary)} {rng.randint(0, 999)}"
+        obj.text = rng.choice([" ", "  ", "\n"]).join(words)
+        tweets.append(obj)
+    return tweets
+
+
+def time_cleaner(cleaner, tweets:list) -> list:
+    """ Cleans copies of 'tweets' with 'cleaner' (an autocleaner method).
+        Returns [seconds, cleaned_tweets].
+    """
+    tweets = copy.deepcopy(tweets)
+    start = time.perf_counter()
+    for obj in tweets: cleaner(obj, [-1.0, 1.0], False)
+    return [time.perf_counter() - start, tweets]
+
+
+def clean_text_steps(content:str) -> list:
+    """ Text steps of BasicCleaner.autocleaner (no sentiment, no name),
+        with the same return as BasicCleaner.clean_single_pass.
+    """
+    content = BasicCleaner.clean_links(content)
+    content, alphatags = BasicCleaner.clean_alphatags(content)
+    content, hashtags = BasicCleaner.clean_hashtags(content)
+    content = BasicCleaner.clean_convert_to_lowercase(content)
+    content = BasicCleaner.clean_stopwords(content)
+    content = BasicCleaner.clean_punctuation(content)
+    content = BasicCleaner.remove_duplica_words(content)
+    return [content, hashtags, alphatags]
+
+
+def time_text(clean_func, tweets:list) -> list:
+    """ Cleans the text of 'tweets' with 'clean_func'.
+        Returns [seconds, results].
+    """
+    start = time.perf_counter()
+    results = [clean_func(obj.text) for obj in tweets]
+    return [time.perf_counter() - start, results]
+
+
+def get_fields(obj:DataObj) -> tuple:
+    "Fields set by cleaning, for comparison."
+    return (
+        obj.text, obj.hashtags, obj.alphatags,
+        obj.valid_sentiment_range, obj.name
+    )
+
+
+def run(count:int = 2000) -> dict:
+    """ Runs the benchmark on 'count' synthetic tweets.
+        Returns a dict with tweets/sec of both cleaners, for text
+        steps only and for the full autocleaner (incl. sentiment),
+        and whether they gave the exact same result.
+    """
+    tweets = get_random_tweets(count)
+    BasicCleaner.autocleaner_single_pass(copy.deepcopy(tweets[0]), [-1.0, 1.0], False)
+    old_text_time, old_texts = time_text(clean_text_steps, tweets)
+    new_text_time, new_texts = time_text(BasicCleaner.clean_single_pass, tweets)
+    old_time, old_tweets = time_cleaner(BasicCleaner.autocleaner, tweets)
+    new_time, new_tweets = time_cleaner(BasicCleaner.autocleaner_single_pass, tweets)
+    return {
+        "tweets": count,
+        "text_steps_per_sec": count / old_text_time,
+        "text_single_pass_per_sec": count / new_text_time,
+        "autocleaner_per_sec": count / old_time,
+        "single_pass_per_sec": count / new_time,
+        "exact": old_texts == new_texts and \
+                 [get_fields(obj) for obj in old_tweets] == \
+                 [get_fields(obj) for obj in new_tweets]
+    }
+
+
+def main(count:str = "2000") -> None:
+    " Runs and prints the benchmark. "
+    result = run(int(count))
+    print(f"{'tweets:':<28}{result['tweets']}")
+    print(f"{'text steps/s:':<28}{result['text_steps_per_sec']:.0f}")
+    print(f"{'text single pass/s:':<28}{result['text_single_pass_per_sec']:.0f}")
+    print(f"{'autocleaner/s:':<28}{result['autocleaner_per_sec']:.0f}")
+    print(f"{'autocleaner_single_pass/s:':<28}{result['single_pass_per_sec']:.0f}")
+    print(f"{'exact:':<28}{result['exact']}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
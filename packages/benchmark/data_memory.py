@@ -0,0 +1,146 @@
+import sys
+import random
+import tracemalloc
+
+from packages.cleaning import data_object_tools
+from packages.cleaning.data_object import DataObj
+from packages.similarity.siminet import SimiNet, vocab
+
+""" Memory benchmark of tweet containers; bytes per tweet for:
+        - legacy: the original DataObj (per-instance __dict__), with
+            tweepy-like coordinates and place, and list siminets.
+        - slots: DataObj (__slots__), compact coordinates and place,
+            and SimiNet siminets.
+    Measured with tracemalloc at pipe buffer size (200 by default,
+    as used by the prefabs), with synthetic tweets.
+
+    Run from the project root:
+        python -m packages.benchmark.data_memory [count]
+"""
+
+class LegacyDataObj():
+    " Original DataObj (before __slots__), kept as reference. "
+
+    def __init__(self):
+        self.unique_id = None
+        self.name = None
+        self.text = None
+        self.coordinates = None
+        self.place = None
+        self.hashtags = []
+        self.alphatags = []
+        self.valid_sentiment_range = False
+        self.siminet = []
+
+
+class FakePlace():
+    " Stand-in for a tweepy Place, with the same kind of fields. "
+
+    def __init__(self, rng:random.Random):
+        self.id = f"{rng.getrandbits(64):016x}"
+        self.url = f"https://api.twitter.com/1.1/geo/id/{self.id}.json"
+        self.place_type = "city"
+        self.name = f"City{rng.randint(0, 999)}"
+        self.full_name = f"{self.name}, Country"
+        self.country_code = "NO"
+        self.country = "Norway"
+        self.bounding_box = {
+            "type": "Polygon",
+            "coordinates": [[[rng.uniform(-180, 180), rng.uniform(-90, 90)]
+                             for _ in range(4)]]
+        }
+        self.attributes = {}
+
+
+def get_random_rows(vocabulary:list,
+                    count:int,
+                    siminet_size:int = 100,
+                    seed:int = 0) -> list:
+    """ Returns 'count' dicts with synthetic values of all
+        DataObj fields (coordinates and place as from tweepy).
+        Words are drawn from 'vocabulary'.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        has_geo = rng.random() < 0.3
+        rows.append({
+            "unique_id": str(10 ** 18 + index),
+            "name": f" user {rng.randint(0, 10 ** 6)}",
+            "text": " ".join(rng.sample(vocabulary, 12)),
+            "coordinates": {
+                "type": "Point",
+                "coordinates": [rng.uniform(-180, 180), rng.uniform(-90, 90)]
+            } if has_geo else None,
+            "place": FakePlace(rng) if has_geo else None,
+            "hashtags": [f"#{rng.choice(vocabulary)}" for _ in range(rng.randint(0, 3))],
+            "alphatags": [f"@{rng.choice(vocabulary)}" for _ in range(rng.randint(0, 2))],
+            "valid_sentiment_range": True,
+            "siminet": [
+                [word, rng.uniform(0.1, 3.0)]
+                for word in rng.sample(vocabulary, siminet_size)
+            ]
+        })
+    return rows
+
+
+def make_legacy(rows:list) -> list:
+    "LegacyDataObj per row, keeping all values as they are."
+    objects = []
+    for row in rows:
+        obj = LegacyDataObj()
+        for field, value in row.items(): setattr(obj, field, value)
+        objects.append(obj)
+    return objects
+
+
+def make_slots(rows:list) -> list:
+    "DataObj per row, as CleaningPipe and SimiPipe create them."
+    objects = []
+    for row in rows:
+        obj = DataObj()
+        for field, value in row.items(): setattr(obj, field, value)
+        obj.coordinates = data_object_tools.get_compact_coordinates(obj.coordinates)
+        obj.place = data_object_tools.get_compact_place(obj.place)
+        obj.siminet = SimiNet.from_list(obj.siminet)
+        objects.append(obj)
+    return objects
+
+
+def measure(make_func, vocabulary:list, count:int, siminet_size:int) -> int:
+    """ Returns bytes still allocated after building 'count' tweets
+        with make_func (from get_random_rows). Temporary rows are freed
+        by then, so this is what the variant keeps alive.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = make_func(get_random_rows(vocabulary, count, siminet_size))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run(count:int = 200, siminet_size:int = 100) -> dict:
+    """ Returns {variant : bytes per tweet} for 'count' tweets with
+        siminets of 'siminet_size' words. Words are shared by all
+        tweets (like the w2v vocabulary is), so they are created and
+        interned before measuring, and not counted.
+    """
+    vocabulary = [f"word{i}" for i in range(20000)]
+    vocab.intern_many(vocabulary)
+    results = {}
+    for variant, make_func in [["legacy", make_legacy], ["slots", make_slots]]:
+        total = measure(make_func, vocabulary, count, siminet_size)
+        results[variant] = total / count
+    return results
+
+
+def main(count:str = "200") -> None:
+    " Runs and prints the benchmark. "
+    for variant, per_tweet in run(int(count)).items():
+        print(f"{variant:<8} {per_tweet:>10.0f} bytes/tweet")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,193 @@
+import os
+import sys
+import time
+import random
+import tempfile
+from types import SimpleNamespace
+
+from packages.benchmark.similarity import get_synthetic_model
+from packages.pipes.collection.base import PipeBase
+from packages.pipes.collection.cleaning import CleaningPipe
+from packages.pipes.collection.simi import SimiPipe
+from packages.pipes.pipeline import Pipeline, ThreadedPipeline
+from packages.pipes.multiprocess import MultiprocessPipeline
+from packages.similarity import process_tools
+
+""" Equivalence check and benchmark of the pipeline runtimes
+    (packages.pipes.pipeline and packages.pipes.multiprocess), on
+    source -> CleaningPipe -> SimiPipe -> sink, with synthetic tweets
+    and a synthetic model (see packages.benchmark.similarity), which is
+    written to a temporary model store such that worker processes load
+    it like a real one.
+    The serial Pipeline is the reference: ordered runtimes must give
+    the exact same dataobjects in the same order, unordered ones the
+    same dataobjects. Reports tweets/sec and whether that holds.
+
+    Run from the project root:
+        python -m packages.benchmark.runtimes [tweet_count]
+"""
+
+MODEL_NAME = "synthetic"
+
+
+class ListFeedPipe(PipeBase):
+
+    """ Source pipe which outputs the items of a list, one per
+        process() call; stands in for FeedFromDiskPipe.
+    """
+
+    def __init__(self, items:list, threshold_output:int = 20) -> None:
+        super(ListFeedPipe, self).__init__(
+                previous_pipe=None,
+                process_task=self.__task,
+                threshold_output=threshold_output,
+                verbosity=False
+        )
+        self.items = list(reversed(items))
+
+
+    def __task(self, _):
+        "Returns the next item, None when all are out."
+        return self.items.pop() if self.items else None
+
+
+    def has_work(self) -> bool:
+        " Whether items are left (and there is room for them). "
+        return bool(self.items) and not self.output.is_blocking()
+
+
+
+class SinkPipe(PipeBase):
+
+    " Last pipe; keeps all dataobjects it gets in self.seen. "
+
+    def __init__(self, previous_pipe) -> None:
+        super(SinkPipe, self).__init__(
+                previous_pipe=previous_pipe,
+                process_task=self.__task,
+                threshold_output=None,
+                verbosity=False
+        )
+        self.seen = []
+
+
+    def __task(self, item):
+        if item: self.seen.append(item)
+
+
+
+def get_random_tweets(words:list, count:int, seed:int = 0) -> list:
+    """ Returns 'count' tweet-like objects (the fields used by
+        data_object_tools.convert_tweet2dataobj) of model words.
+    """
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            id_str=str(index),
+            user=SimpleNamespace(name=f"user{index % 7}"),
+            text=" ".join(rng.sample(words, 8)) + f" #tag{index % 5} @user{index % 3}",
+            coordinates=None,
+            place=None
+        )
+        for index in range(count)
+    ]
+
+
+def get_pipes(tweets:list, load_model:bool) -> list:
+    "Returns [source, cleaning, simi, sink] pipes for 'tweets'."
+    source = ListFeedPipe(tweets)
+    cleaning = CleaningPipe(previous_pipe=source, threshold_output=20)
+    simi = SimiPipe(
+        previous_pipe=cleaning,
+        threshold_output=20,
+        recursion_level=2,
+        model_name=MODEL_NAME,
+        load_model=load_model
+    )
+    return [source, cleaning, simi, SinkPipe(simi)]
+
+
+def run_pipeline(pipeline, count:int, timeout:float) -> float:
+    """ Runs 'pipeline' until its last pipe (SinkPipe) saw 'count'
+        dataobjects, or 'timeout' seconds. Returns the seconds taken.
+    """
+    sink = pipeline.pipes[-1]
+    start = time.perf_counter()
+    if isinstance(pipeline, ThreadedPipeline):
+        pipeline.start()
+        try:
+            while len(sink.seen) < count and time.perf_counter() - start < timeout:
+                time.sleep(0.005)
+        finally:
+            pipeline.stop(timeout=10.0)
+        if pipeline.errors: raise pipeline.errors[0]
+    else: # // Same loop as Pipeline.run, with an end.
+        while len(sink.seen) < count and time.perf_counter() - start < timeout:
+            if not pipeline.process_ready(): pipeline.process_all()
+    return time.perf_counter() - start
+
+
+def get_signature(data_obj) -> tuple:
+    "Returns the fields of 'data_obj' which the runtimes must agree on."
+    return (
+        data_obj.unique_id, data_obj.name, data_obj.text,
+        tuple(data_obj.hashtags), tuple(data_obj.alphatags),
+        data_obj.valid_sentiment_range, tuple(map(tuple, data_obj.siminet))
+    )
+
+
+def run(count:int = 150, workers:int = 2, timeout:float = 120.0) -> list:
+    """ Runs all runtimes over the same 'count' tweets, see module
+        docstring. Returns a list of dicts.
+    """
+    model = get_synthetic_model(vocab_size=5000)
+    words = [word for word in model.index_to_key if word.isalpha()][:800]
+    tweets = get_random_tweets(words, count)
+    runtimes = [
+        ["serial", Pipeline, {}, True],
+        ["threaded", ThreadedPipeline, {}, True],
+        ["multiprocess", MultiprocessPipeline, {"workers": workers}, True],
+        ["multiprocess(unordered)", MultiprocessPipeline,
+            {"workers": workers, "ordered": False}, False],
+    ]
+    results = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        model.save(
+            process_tools.get_model_path(MODEL_NAME, model_dir),
+            separately=["vectors"]
+        )
+        previous_dir = os.environ.get(process_tools.MODEL_DIR_ENV)
+        os.environ[process_tools.MODEL_DIR_ENV] = model_dir # // Also for workers.
+        try:
+            reference = None
+            for name, runtime, kwargs, ordered in runtimes:
+                multiprocess = runtime is MultiprocessPipeline
+                pipeline = runtime(get_pipes(tweets, not multiprocess), **kwargs)
+                seconds = run_pipeline(pipeline, count, timeout)
+                output = [get_signature(obj) for obj in pipeline.pipes[-1].seen]
+                if reference is None: reference = output
+                equal = output == reference if ordered else sorted(output) == sorted(reference)
+                results.append({
+                    "runtime": name,
+                    "tweets": len(output),
+                    "tweets_per_sec": len(output) / seconds,
+                    "equal": equal and len(output) == count
+                })
+        finally:
+            if previous_dir is None: del os.environ[process_tools.MODEL_DIR_ENV]
+            else: os.environ[process_tools.MODEL_DIR_ENV] = previous_dir
+    return results
+
+
+def main(count:str = "150") -> None:
+    " Runs and prints the benchmark. "
+    print(f"{'runtime':<26} {'tweets':>6} {'tweets/s':>10}  equal")
+    for result in run(count=int(count)):
+        print(
+            f"{result['runtime']:<26} {result['tweets']:>6} "
+            f"{result['tweets_per_sec']:>10.1f}  {result['equal']}"
+        )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,181 @@
+import sys
+import json
+import time
+import random
+import tracemalloc
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from packages.cleaning.data_object import DataObj
+from packages.similarity.process_tools import ProcessSimilarity
+from packages.similarity.siminet import SimiNet
+
+""" Offline benchmark suite for packages.similarity.process_tools.
+    Uses a deterministic synthetic w2v model (random vectors, see
+    get_synthetic_model), so it needs no network and no downloaded
+    model. Timed:
+        - get_similarity_net, recursion levels 1-3.
+        - compress_similarity_net.
+        - get_score_compressed_siminet (list and SimiNet format).
+        - get_top_simi_index.
+        - get_representatives.
+    Each case is run over a few input sizes, and reports ops/sec plus
+    peak memory (tracemalloc, from a separate untimed run). Results
+    are written as JSON, such that runs can be compared.
+
+    Run from the project root:
+        python -m packages.benchmark.similarity [output_path]
+"""
+
+def get_synthetic_model(vocab_size:int = 20000,
+                        dim:int = 25,
+                        seed:int = 0) -> KeyedVectors:
+    """ Returns a KeyedVectors model with 'vocab_size' random words and
+        standard normal vectors of 'dim' dimensions. Same seed, same
+        model. About one word in five has digits or punctuation, like
+        the twitter vocabulary, such that siminet filtering is exercised.
+    """
+    rng = random.Random(seed)
+    alpha = "abcdefghijklmnopqrstuvwxyz"
+    words = {}
+    while len(words) < vocab_size:
+        length = rng.randint(1, 8)
+        chars = alpha if rng.random() < 0.8 else alpha + "0123456789#!_"
+        words["".join(rng.choice(chars) for _ in range(length))] = None
+    model = KeyedVectors(dim)
+    vectors = np.random.default_rng(seed).standard_normal((vocab_size, dim))
+    model.add_vectors(list(words), vectors.astype(np.float32))
+    return model
+
+
+def get_simitool(model:KeyedVectors) -> ProcessSimilarity:
+    """ Returns a simitool using 'model'. The neighbour cache is off,
+        such that every run does the full work.
+    """
+    simitool = ProcessSimilarity(cache_size=0)
+    simitool.w2v_model = model
+    simitool.model_name = "synthetic"
+    return simitool
+
+
+def get_queries(model:KeyedVectors, count:int, size:int, seed:int = 0) -> list:
+    "Returns 'count' queries (list of words) with 'size' alpha words each."
+    rng = random.Random(seed)
+    words = [word for word in model.index_to_key if word.isalpha()]
+    return [rng.sample(words, size) for _ in range(count)]
+
+
+def get_tree_siminet(model:KeyedVectors, size:int, seed:int = 0) -> list:
+    """ Returns a random uncompressed siminet (tree format, see
+        ProcessSimilarity.compress_similarity_net) with 'size' rows,
+        drawn from a small share of the vocabulary such that words
+        repeat like in real trees.
+    """
+    rng = random.Random(seed)
+    words = model.index_to_key[:max(size // 3, 1)]
+    return [
+        [rng.randint(0, 2), rng.choice(words), rng.choice(words), rng.random()]
+        for _ in range(size)
+    ]
+
+
+def get_dataobjects(simitool:ProcessSimilarity, queries:list) -> list:
+    "Returns a DataObj with text and (SimiNet) siminet per query."
+    objects = []
+    for index, query in enumerate(queries):
+        obj = DataObj()
+        obj.text = " ".join(query)
+        obj.unique_id = index
+        obj.siminet = SimiNet.from_list(
+            simitool.get_similarity_net(query=query, max_recursion=1)
+        )
+        objects.append(obj)
+    return objects
+
+
+def measure(func, args_list:list, repeat:int = 1) -> dict:
+    """ Calls 'func' with each args tuple in 'args_list', 'repeat' times.
+        Returns {"ops_per_sec", "peak_memory_bytes"}, where the peak is
+        measured in a separate (untimed) run over 'args_list'.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in args_list: func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for args in args_list: func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ops_per_sec": len(args_list) * repeat / elapsed,
+        "peak_memory_bytes": peak
+    }
+
+
+def run(vocab_size:int = 20000,
+        dim:int = 25,
+        query_sizes:list = [5, 10, 20],
+        tree_sizes:list = [100, 1000, 10000],
+        object_counts:list = [10, 50, 200],
+        seed:int = 0) -> list:
+    """ Runs all cases on a synthetic model (see module docstring).
+        Returns a list of dicts: {"case", "size", "ops_per_sec",
+        "peak_memory_bytes"}, where 'size' is words per query, rows
+        per tree, or objects per call, depending on the case.
+    """
+    model = get_synthetic_model(vocab_size=vocab_size, dim=dim, seed=seed)
+    simitool = get_simitool(model)
+    results = []
+
+    def add(case:str, size:int, func, args_list:list, repeat:int = 1) -> None:
+        result = measure(func, args_list, repeat)
+        results.append({"case": case, "size": size, **result})
+
+    for size in query_sizes:
+        queries = get_queries(model, count=5, size=size, seed=seed)
+        for level in [1, 2, 3]:
+            add(f"get_similarity_net_rec{level}", size,
+                simitool.get_similarity_net,
+                [(query, level) for query in queries])
+
+    for size in tree_sizes:
+        tree = get_tree_siminet(model, size=size, seed=seed)
+        add("compress_similarity_net", size,
+            simitool.compress_similarity_net, [(tree,)], repeat=5)
+
+    for count in object_counts:
+        queries = get_queries(model, count=count, size=10, seed=seed)
+        objects = get_dataobjects(simitool, queries)
+        lists = [obj.siminet.to_list() for obj in objects]
+        pairs = [(lists[0], other) for other in lists]
+        add("get_score_compressed_siminet_list", count,
+            simitool.get_score_compressed_siminet, pairs)
+        add("get_score_compressed_siminet_siminet", count,
+            simitool.get_score_compressed_siminet,
+            [(objects[0].siminet, obj.siminet) for obj in objects])
+        add("get_top_simi_index", count,
+            simitool.get_top_simi_index, [(objects[0], objects[1:])], repeat=5)
+        add("get_representatives", count,
+            simitool.get_representatives, [(objects,)], repeat=3)
+    return results
+
+
+def main(path:str = "bench_similarity.json") -> None:
+    " Runs the benchmark, prints it and writes the results to 'path' as JSON. "
+    results = run()
+    print(f"{'case':<40} {'size':>6} {'ops/s':>12} {'peak KiB':>10}")
+    for result in results:
+        print(
+            f"{result['case']:<40} {result['size']:>6} "
+            f"{result['ops_per_sec']:>12.1f} "
+            f"{result['peak_memory_bytes'] / 1024:>10.0f}"
+        )
+    with open(path, "w") as f:
+        json.dump({"results": results}, f, indent=2)
+    print(f"Written to '{path}'.")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,77 @@
+import sys
+import time
+import random
+
+from packages.cleaning import data_object_tools
+from packages.similarity.siminet import SimiNet, vocab
+
+""" Encode/decode benchmark of siminet db properties
+    (packages.cleaning.data_object_tools), comparing:
+        - text: siminet_to_txt / txt_to_siminet (list format),
+            also decoded into a SimiNet, like the binary format is.
+        - binary: encode_siminet / decode_siminet (base64 of
+            float64 scores and utf-8 words), from a list and
+            from a SimiNet.
+    Reports siminets/sec and the mean property size in bytes,
+    for synthetic siminets.
+
+    Run from the project root:
+        python -m packages.benchmark.siminet_encoding [count] [siminet_size]
+"""
+
+def get_random_siminets(count:int, siminet_size:int, seed:int = 0) -> list:
+    "Returns 'count' list format siminets of 'siminet_size' words."
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    vocab.intern_many(vocabulary)
+    return [
+        [[word, rng.uniform(0.1, 3.0)] for word in rng.sample(vocabulary, siminet_size)]
+        for _ in range(count)
+    ]
+
+
+def time_func(func, items:list, repeat:int = 3) -> float:
+    "Returns items/sec of func over all items (best of 'repeat')."
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items: func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(items) / best
+
+
+def run(count:int = 1000, siminet_size:int = 100) -> dict:
+    """ Returns {case : [siminets/sec encode, siminets/sec decode,
+        mean bytes]} for 'count' siminets of 'siminet_size' words.
+    """
+    siminets = get_random_siminets(count, siminet_size)
+    compact = [SimiNet.from_list(siminet) for siminet in siminets]
+    results = {}
+    for case, source, encode, decode in [
+            ["text", siminets, data_object_tools.siminet_to_txt,
+             data_object_tools.txt_to_siminet],
+            ["text(SimiNet)", siminets, data_object_tools.siminet_to_txt,
+             lambda txt: SimiNet.from_list(data_object_tools.txt_to_siminet(txt))],
+            ["binary(list)", siminets, data_object_tools.encode_siminet,
+             data_object_tools.decode_siminet],
+            ["binary(SimiNet)", compact, data_object_tools.encode_siminet,
+             data_object_tools.decode_siminet]]:
+        encoded = [encode(siminet) for siminet in source]
+        results[case] = [
+            time_func(encode, source),
+            time_func(decode, encoded),
+            sum([len(value) for value in encoded]) / count
+        ]
+    return results
+
+
+def main(count:str = "1000", siminet_size:str = "100") -> None:
+    " Runs and prints the benchmark. "
+    print(f"{'case':<16} {'encode/s':>10} {'decode/s':>10} {'bytes':>8}")
+    for case, [encode, decode, size] in run(int(count), int(siminet_size)).items():
+        print(f"{case:<16} {encode:>10.0f} {decode:>10.0f} {size:>8.0f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,108 @@
+import time
+import random
+
+from packages.similarity.process_tools import ProcessSimilarity
+from packages.similarity.siminet import SimiNet
+
+""" Benchmark of siminet pair scoring
+    (ProcessSimilarity.get_score_compressed_siminet), comparing:
+        - legacy: the original nested loop, O(n * m).
+        - list: hash join on the list format.
+        - siminet: sorted merge on SimiNet (packages.similarity.siminet).
+    All three must give the exact same score, which is checked.
+
+    Run from the project root:
+        python -m packages.benchmark.siminet_scoring
+"""
+
+def legacy_score(new:list, other:list) -> float:
+    " Original ProcessSimilarity.get_score_compressed_siminet, kept as reference. "
+    total_score = 0
+    for item_new in new:
+        for item_other in other:
+            word_a = item_new[0]
+            score_a = item_new[1]
+            word_b = item_other[0]
+            score_b = item_other[1]
+            if word_a == word_b: total_score += (score_a + score_b)
+    return total_score
+
+
+def get_random_siminets(count:int, size:int, vocab_size:int, seed:int = 0) -> list:
+    """ Creates 'count' random siminets (list format) with 'size' unique
+        words each. Words are drawn from a vocabulary of 'vocab_size'
+        with a skewed distribution, such that siminets overlap roughly
+        like real ones (common words are shared by many).
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(vocab_size)]
+    siminets = []
+    for _ in range(count):
+        words = {}
+        while len(words) < size:
+            index = int(rng.paretovariate(1.2)) - 1
+            if index < vocab_size: words[vocabulary[index]] = None
+        siminets.append([[word, rng.uniform(0.1, 3.0)] for word in words])
+    return siminets
+
+
+def time_pairs(score_func, siminets:list) -> list:
+    """ Scores all pairs in 'siminets' with 'score_func'.
+        Returns [seconds, scores].
+    """
+    scores = []
+    start = time.perf_counter()
+    for new in siminets:
+        for other in siminets:
+            scores.append(score_func(new, other))
+    return [time.perf_counter() - start, scores]
+
+
+def run(sizes:list = [50, 200, 500], count:int = 20, vocab_size:int = 20000) -> list:
+    """ Runs the benchmark for each siminet size in 'sizes', with
+        'count' siminets (count^2 pairs). Returns a list of dicts.
+    """
+    simitool = ProcessSimilarity(cache_size=0)
+    results = []
+    for size in sizes:
+        siminets = get_random_siminets(count, size, vocab_size, seed=size)
+        compact = [SimiNet.from_list(siminet) for siminet in siminets]
+        legacy_time, legacy_scores = time_pairs(legacy_score, siminets)
+        list_time, list_scores = time_pairs(
+            simitool.get_score_compressed_siminet, siminets
+        )
+        compact_time, compact_scores = time_pairs(
+            simitool.get_score_compressed_siminet, compact
+        )
+        # // SimiNet rows are in id order, so compare against legacy in that order.
+        _, legacy_compact_scores = time_pairs(
+            legacy_score, [list(siminet) for siminet in compact]
+        )
+        pair_count = count * count
+        results.append({
+            "size": size,
+            "pairs": pair_count,
+            "legacy_pairs_per_sec": pair_count / legacy_time,
+            "list_pairs_per_sec": pair_count / list_time,
+            "siminet_pairs_per_sec": pair_count / compact_time,
+            "list_exact": list_scores == legacy_scores,
+            "siminet_exact": compact_scores == legacy_compact_scores
+        })
+    return results
+
+
+def main() -> None:
+    " Runs and prints the benchmark. "
+    print(f"{'size':>6} {'legacy/s':>12} {'list/s':>12} {'siminet/s':>12}  exact")
+    for result in run():
+        print(
+            f"{result['size']:>6} "
+            f"{result['legacy_pairs_per_sec']:>12.0f} "
+            f"{result['list_pairs_per_sec']:>12.0f} "
+            f"{result['siminet_pairs_per_sec']:>12.0f}  "
+            f"{result['list_exact'] and result['siminet_exact']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
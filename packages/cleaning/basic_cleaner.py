@@ -4,9 +4,13 @@ import string
 from textblob import TextBlob as TB
 
 import packages.cleaning.custom_stopwords as custom_stopwords
+from packages.cleaning import sentiment
+from packages.cleaning import data_object_tools
 from nltk.tokenize import word_tokenize
 from nltk.tokenize.treebank import TreebankWordDetokenizer 
 
+# // Precompiled, see BasicCleaner.clean_links.
+LINK_PATTERN = re.compile(r"[a-z]*[:.]+\S+")
 
 
 class BasicCleaner():
@@ -75,6 +79,113 @@ class BasicCleaner():
             self.print_comparison(data_obj, text_raw)
 
 
+    @classmethod
+    def autocleaner_single_pass(self, 
+                                data_obj, 
+                                sentiment_range:float, 
+                                verbosity:bool) -> None:
+        """ Same as self.autocleaner (same result), but the text is
+            cleaned in one pass over its words with self.clean_single_pass,
+            instead of one pass per cleaning step.
+            Note: in-place processing. 
+        """
+        text_raw = data_obj.text
+
+        cleaned = self.clean_single_pass(data_obj.text)
+        data_obj.text = cleaned[0]
+        data_obj.hashtags = cleaned[1]
+        data_obj.alphatags = cleaned[2]
+        data_obj.valid_sentiment_range = self.set_sentiment(
+                                               data_obj.text,
+                                               sentiment_range
+                                        )
+        # // Clean name (db safety).
+        data_obj.name = self.clean_punctuation(data_obj.name)
+
+        if verbosity:
+            self.print_comparison(data_obj, text_raw)
+
+
+    @staticmethod
+    def clean_single_pass(content:str) -> list:
+        """ Does all text steps of autocleaner in one pass over the
+            words (whitespace separated chunks) of 'content':
+            links, alphatags, hashtags, lower-case, stop-words,
+            punctuation and duplicates. Returns a list:
+                [text, hashtags, alphatags]
+            Example:
+                "The #Zen of @python https://x.y" ->
+                    ["zen", ["#Zen"], ["@python"]] 
+            NOTE: Link, alphatag and hashtag patterns never span
+                whitespace, so each can be cut from a word on its own;
+                in the same order as autocleaner does it.
+        """
+        stop_words = custom_stopwords.get_stopwords()
+        search_link = LINK_PATTERN.search
+        words = []
+        hashtags = []
+        alphatags = []
+        for chunk in content.split():
+            # // Links; drop from the first match to the end of the word.
+            # // A link has a ':' or '.', skip the regex if there is none.
+            if ":" in chunk or "." in chunk:
+                link = search_link(chunk)
+                if link: chunk = chunk[:link.start()]
+            # // Alphatags, then hashtags; from first '@' / '#' to the end.
+            index = chunk.find("@")
+            if index != -1:
+                alphatags.append(chunk[index:])
+                chunk = chunk[:index]
+            index = chunk.find("#")
+            if index != -1:
+                hashtags.append(chunk[index:])
+                chunk = chunk[:index]
+            if not chunk: continue
+
+            chunk = chunk.lower()
+            if chunk in stop_words: continue
+            # // Keep alpha only.
+            if not chunk.isalpha(): 
+                chunk = "".join([char for char in chunk if char.isalpha()])
+                if not chunk: continue
+            words.append(chunk)
+        # // Set order as in remove_duplica_words.
+        return [" ".join(set(words)), hashtags, alphatags]
+
+
+    @classmethod
+    def autocleaner_batch(self, 
+                          data_objs:list, 
+                          sentiment_range:float, 
+                          verbosity:bool = False,
+                          pool = None,
+                          chunk_size:int = 64,
+                          convert_tweets:bool = False) -> list:
+        """ Cleans a list of DataObject(packages.cleaning.data_object)
+            with self.autocleaner_single_pass. Returns the list of
+            cleaned DataObjects, in the same order.
+            With 'pool' (multiprocessing.Pool), chunks of 'chunk_size'
+            objects are cleaned in worker processes; the returned
+            objects are then copies, not the ones passed in.
+            With 'convert_tweets', 'data_objs' are tweepy tweets, which
+            are converted into DataObjects first (by the workers, with
+            'pool'; see data_object_tools.convert_tweet2dataobj).
+        """
+        if pool is None:
+            if convert_tweets:
+                data_objs = [data_object_tools.convert_tweet2dataobj(tweet) for tweet in data_objs]
+            for data_obj in data_objs:
+                self.autocleaner_single_pass(data_obj, sentiment_range, verbosity)
+            return data_objs
+        chunks = [
+            [data_objs[start:start + chunk_size], sentiment_range, verbosity, convert_tweets]
+            for start in range(0, len(data_objs), chunk_size)
+        ]
+        cleaned = []
+        for chunk in pool.map(_clean_chunk, chunks): cleaned.extend(chunk)
+        return cleaned
+
+
     @staticmethod
     def remove_duplica_words(content:str) -> str:
         """ Removing duplicate words in a string
@@ -90,9 +201,10 @@ class BasicCleaner():
         """ This method removes stop-words from
             a string before returning it back.
         """
+        stop_words = custom_stopwords.get_stopwords()
         content = content.split()
         filtered = [item for item in content
-                    if not item in custom_stopwords.main()]
+                    if not item in stop_words]
         return ' '.join(filtered)
 
 
@@ -102,16 +214,13 @@ class BasicCleaner():
             numbers (leaving only alpha), from 
             a string before returning it back.
         """
-        new_string = ""
+        new_string = []
         str_split = content.split()
         for chunk in str_split:
-            tmp = ""
-            for char in chunk:
-                if char.isalpha():
-                    tmp += char
+            tmp = "".join([char for char in chunk if char.isalpha()])
             if len(tmp) > 0:
-                new_string += f" {tmp}" # // could check if tmp only contains space.
-        return new_string
+                new_string.append(f" {tmp}") # // could check if tmp only contains space.
+        return "".join(new_string)
 
 
     @staticmethod
@@ -120,7 +229,7 @@ class BasicCleaner():
             links from a string before returning
             it back. This is not fool-proof.
         """
-        links = re.sub(r"[a-z]*[:.]+\S+","",content)
+        links = LINK_PATTERN.sub("",content)
         return links
 
 
@@ -169,7 +278,7 @@ class BasicCleaner():
 
 
     @staticmethod
-    def set_sentiment(content:str, range:list) -> bool:
+    def set_sentiment(content:str, range:list, analyzer:str = "lexicon") -> bool:
         """ Uses textblob to guauge if some content is
             within a sentiment range. 'range' must be
             in this form: [float(lower), float(upper)].
@@ -179,6 +288,25 @@ class BasicCleaner():
                 -1.0 and 0.0
             Returns a True if the 'content' is within
             the specified range, else false.
+
+            Lazy: if 'range' covers [-1.0, 1.0], every score is within
+            it, so True is returned without scoring 'content'.
+            'analyzer' is either:
+                - "lexicon": packages.cleaning.sentiment, same polarity
+                    as textblob for cleaned text, but much faster.
+                - "textblob": full textblob analysis.
         """
-        score = TB(content).sentiment[0]
-        return (score >= range[0]) and (score <= range[1])
\ No newline at end of file
+        if range[0] <= -1.0 and range[1] >= 1.0: return True
+        if analyzer == "lexicon": score = sentiment.get_polarity(content)
+        elif analyzer == "textblob": score = TB(content).sentiment[0]
+        else: raise ValueError(f"Unknown sentiment analyzer '{analyzer}'")
+        return (score >= range[0]) and (score <= range[1])
+
+
+
+def _clean_chunk(args:list) -> list:
+    "Pool task of BasicCleaner.autocleaner_batch; args: [data_objs, range, verbosity, convert_tweets]."
+    data_objs, sentiment_range, verbosity, convert_tweets = args
+    return BasicCleaner.autocleaner_batch(
+        data_objs, sentiment_range, verbosity, convert_tweets=convert_tweets
+    )
@@ -6,7 +6,7 @@ from nltk.corpus import stopwords
 
 import_file = "packages/cleaning/custom_stopwords_list.txt"
 
-__collection = []
+__stopwords = None # // Cache of get_stopwords().
 
 def __file_to_list(path:str, out_list:list) -> None:
     """ Simply open a file and import words
@@ -27,8 +27,17 @@ def main() -> set:
         stopwords from nltk.corpus.stopwords,
         before returning a set (no duplicates).
     """
-    __file_to_list(import_file, __collection)
+    collection = [] # // Per call, such that calls do not pile up words.
+    __file_to_list(import_file, collection)
     stop_words = stopwords.words('english')
-    __collection.extend(stop_words)
-    return set(__collection)
+    collection.extend(stop_words)
+    return set(collection)
 
+
+def get_stopwords() -> frozenset:
+    """ Same words as main(), but loaded once per
+        process and returned as a frozenset.
+    """
+    global __stopwords
+    if __stopwords is None: __stopwords = frozenset(main())
+    return __stopwords
@@ -3,8 +3,17 @@ class DataObj():
     """ This class is meant to be a container of 
         tweet data for the TwitterNoodle project.
         It is passed along most of the system.
+
+        NOTE: Uses __slots__ (no per-instance __dict__), since
+            many of these wait in pipe output lists. Fields
+            can't be added outside of this class.
     """
 
+    __slots__ = (
+        "unique_id", "name", "text", "coordinates", "place",
+        "hashtags", "alphatags", "valid_sentiment_range", "siminet"
+    )
+
     def __init__(self):
         """ Initialises an emty DataObj with
             some useful fields. Values are 
@@ -14,6 +23,8 @@ class DataObj():
         self.name = None
         
         self.text = None
+        # // Compact forms, see packages.cleaning.data_object_tools:
+        # // (longitude, latitude) and the place name.
         self.coordinates = None
         self.place = None
         
@@ -22,4 +33,25 @@ class DataObj():
         self.valid_sentiment_range = False
 
         # // Note: siminet is created in packages.similarity.process_tools.
+        # // It is either a list or packages.similarity.siminet.SimiNet.
         self.siminet = []
+
+
+    def __getstate__(self) -> dict:
+        return {field : getattr(self, field) for field in self.__slots__}
+
+
+    def __setstate__(self, state) -> None:
+        """ Accepts the state of self.__getstate__, and of pickles
+            made before __slots__ (a __dict__, possibly with the
+            full tweepy coordinates and place).
+        """
+        if isinstance(state, tuple): state = state[1] # // (dict, slots) form.
+        self.__init__()
+        for field, value in state.items():
+            if field in self.__slots__: setattr(self, field, value)
+        # // Old pickles; compact tweepy objects. Imported here, as
+        # // data_object_tools imports this module.
+        from packages.cleaning import data_object_tools
+        self.coordinates = data_object_tools.get_compact_coordinates(self.coordinates)
+        self.place = data_object_tools.get_compact_place(self.place)
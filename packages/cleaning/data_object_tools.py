@@ -1,4 +1,10 @@
+import base64
+import struct
+
+import numpy as np
+
 from packages.cleaning import data_object
+from packages.similarity.siminet import SimiNet, UNKNOWN_ID, vocab
 
 """ This module contains some tools useful
     for handling DataObjects(packages.cleaning.data_object).
@@ -13,11 +19,33 @@ def convert_tweet2dataobj(tweet): # -> DataObj
     new_obj.unique_id = tweet.id_str
     new_obj.name = tweet.user.name
     new_obj.text = tweet.text
-    new_obj.coordinates = tweet.coordinates
-    new_obj.place = tweet.place
+    new_obj.coordinates = get_compact_coordinates(tweet.coordinates)
+    new_obj.place = get_compact_place(tweet.place)
     return new_obj
 
 
+def get_compact_coordinates(coordinates) -> tuple:
+    """ Converts tweepy tweet coordinates (GeoJSON point, a dict:
+        {"type": "Point", "coordinates": [longitude, latitude]})
+        into a tuple: (longitude, latitude). None if not set;
+        compact values are returned as they are.
+    """
+    if coordinates is None or isinstance(coordinates, tuple): return coordinates
+    if isinstance(coordinates, dict): coordinates = coordinates.get("coordinates")
+    if not coordinates: return None
+    return (float(coordinates[0]), float(coordinates[1]))
+
+
+def get_compact_place(place) -> str:
+    """ Converts a tweepy place into its full name (str), such that
+        the place object (with bounding box etc) is not kept alive.
+        None if not set; compact values are returned as they are.
+    """
+    if place is None or isinstance(place, str): return place
+    if isinstance(place, dict): return place.get("full_name")
+    return getattr(place, "full_name", None)
+
+
 def siminet_to_txt(siminet:list, row_sep:str = "--", col_sep:str = "||") -> str:
     """ Converts a similarity net (see packages.similarity.process_tools),
         which is a 2d list, into a string. This is useful formatting
@@ -25,13 +53,9 @@ def siminet_to_txt(siminet:list, row_sep:str = "--", col_sep:str = "||") -> str:
         specifically). Use txt_to_siminet, which is another function in
         this module, to convert back.
     """
-    txt = ""
-    for row in siminet:
-        word = str(row[0])
-        confidence = str(row[1])
-        txt += f"{word}{col_sep}{confidence}{row_sep}"
-        
-    return txt
+    return "".join([
+        f"{row[0]}{col_sep}{row[1]}{row_sep}" for row in siminet
+    ])
 
 
 def txt_to_siminet(txt, row_sep:str = "--", col_sep:str = "||") -> list:
@@ -53,4 +77,120 @@ def txt_to_siminet(txt, row_sep:str = "--", col_sep:str = "||") -> list:
             confidence = float(columns[1])
             siminet.append([word, confidence])
                 
-    return siminet
\ No newline at end of file
+    return siminet
+
+
+# // Binary siminet format: header (magic, score dtype code, word count),
+# // scores, then utf-8 words separated by NUL. The header is 8 bytes,
+# // such that scores are aligned for numpy.frombuffer.
+SIMINET_MAGIC = b"SN\x01"
+SIMINET_HEADER = struct.Struct("<3sBI")
+# // {dtype code : score dtype}; float64 is only used with 'precise'.
+SIMINET_DTYPES = {0: "<f4", 1: "<f8"}
+# // Prefix of base64 encoded siminets (string db properties).
+SIMINET_B64_PREFIX = "b64:"
+
+
+def siminet_to_bytes(siminet, precise:bool = False) -> bytes:
+    """ Converts a siminet (list format or SimiNet, see
+        packages.similarity.siminet) into the binary format
+        (see comment above). Use bytes_to_siminet to convert back.
+        NOTE: Scores are stored as float32, so about 7 significant
+            digits are kept (the text format keeps all 17), unless
+            'precise' is set (float64, lossless).
+    """
+    dtype_code = 1 if precise else 0
+    dtype = SIMINET_DTYPES[dtype_code]
+    if isinstance(siminet, SimiNet):
+        words = siminet.words
+        scores = siminet.scores.astype(dtype)
+    else:
+        words = [str(row[0]) for row in siminet]
+        scores = np.array([row[1] for row in siminet], dtype=dtype)
+    return b"".join([
+        SIMINET_HEADER.pack(SIMINET_MAGIC, dtype_code, len(words)),
+        scores.tobytes(),
+        "\0".join(words).encode("utf-8")
+    ])
+
+
+def get_siminet_arrays(data:bytes) -> list:
+    """ Reads the binary format (see siminet_to_bytes) into
+        [words(list), scores]. Scores is a read-only float32
+        (float64 if precise) array over the buffer of 'data'.
+    """
+    magic, dtype_code, count = SIMINET_HEADER.unpack_from(data)
+    if magic != SIMINET_MAGIC or dtype_code not in SIMINET_DTYPES:
+        raise ValueError("Not a binary siminet.")
+    dtype = np.dtype(SIMINET_DTYPES[dtype_code])
+    words_start = SIMINET_HEADER.size + count * dtype.itemsize
+    scores = np.frombuffer(data, dtype=dtype, count=count, offset=SIMINET_HEADER.size)
+    words = data[words_start:].decode("utf-8").split("\0") if count else []
+    if len(words) != count:
+        raise ValueError("Expected one word per score in binary siminet.")
+    return [words, scores]
+
+
+def bytes_to_siminet(data:bytes) -> SimiNet:
+    "Converts the binary format (see siminet_to_bytes) into a SimiNet."
+    words, scores = get_siminet_arrays(data)
+    ids = vocab.intern_many(words)
+    if len(ids) and ids.min() == UNKNOWN_ID:
+        # // Full vocab; let SimiNet leave out the new words.
+        return SimiNet.from_list(list(zip(words, scores.tolist())))
+    order = np.argsort(ids, kind="stable")
+    ids = ids[order]
+    if len(ids) > 1 and np.any(ids[1:] == ids[:-1]):
+        # // Repeated words (only from list siminets); let SimiNet sum them.
+        return SimiNet.from_list(list(zip(words, scores.tolist())))
+    return SimiNet(ids=ids, scores=scores[order].astype(np.float64, copy=False))
+
+
+def encode_siminet(siminet, precise:bool = True) -> str:
+    """ Converts a siminet (list format or SimiNet) into a string
+        property for the db: the binary format (see siminet_to_bytes),
+        base64 encoded with SIMINET_B64_PREFIX. The base64 alphabet
+        has no quotes, so it is safe to put into Cypher commands.
+        Scores are float64 (lossless, as the text format), unless
+        'precise' is unset. Use decode_siminet to convert back.
+    """
+    return SIMINET_B64_PREFIX + base64.b64encode(
+        siminet_to_bytes(siminet, precise=precise)).decode("ascii")
+
+
+def decode_siminet(value): # -> SimiNet or list
+    """ Converts a siminet db property back into a siminet. Reads both
+        encode_siminet strings (returns a SimiNet) and the older text
+        format of siminet_to_txt (returns the list format), as well as
+        raw binary format bytes.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes_to_siminet(bytes(value))
+    if value.startswith(SIMINET_B64_PREFIX):
+        return bytes_to_siminet(base64.b64decode(value[len(SIMINET_B64_PREFIX):]))
+    return txt_to_siminet(value)
+
+
+def dataobj_to_tuple(obj) -> tuple:
+    """ Converts a DataObj (packages.cleaning.data_object) into a
+        compact tuple of its fields (in DataObj.__slots__ order), for
+        sending between processes. The siminet is in the binary format
+        (see siminet_to_bytes, precise), other fields are as they are.
+        Use tuple_to_dataobj to convert back.
+    """
+    values = [getattr(obj, field) for field in obj.__slots__]
+    siminet = values[-1]
+    if siminet: values[-1] = siminet_to_bytes(siminet, precise=True)
+    return tuple(values)
+
+
+def tuple_to_dataobj(values:tuple): # -> DataObj
+    """ Converts a tuple of dataobj_to_tuple back into a new DataObj.
+        Binary siminets become SimiNet.
+    """
+    new_obj = data_object.DataObj()
+    for field, value in zip(new_obj.__slots__, values):
+        setattr(new_obj, field, value)
+    if isinstance(new_obj.siminet, bytes):
+        new_obj.siminet = bytes_to_siminet(new_obj.siminet)
+    return new_obj
@@ -0,0 +1,93 @@
+import functools
+
+from textblob.en import sentiment as textblob_lexicon
+
+""" A fast sentiment (polarity) scorer for cleaned tweet text, used by
+    BasicCleaner.set_sentiment (packages.cleaning.basic_cleaner).
+
+    It uses the same word lexicon and the same rules for modifiers
+    ("very good") and negations ("not good") as TextBlob, but skips
+    TextBlob's tokenizer, part-of-speech free lexicon lookups and
+    per-call object creation:
+        - The lexicon is flattened once into a word-polarity table
+            (see get_table).
+        - Per-token lookups are memoized (see get_token_entry).
+    For cleaned text (lower-case, alpha-only words, as produced by
+    BasicCleaner) the polarity is the same as TextBlob's.
+    NOTE: Punctuation based rules of TextBlob ('!' boosts, emoticons)
+        are not applied, cleaned text has no punctuation.
+"""
+
+NEGATIONS = frozenset(textblob_lexicon.negations)
+MODIFIER_TAGS = tuple(textblob_lexicon.modifiers)
+
+__table = None # // Cache of get_table().
+
+
+def get_table() -> dict:
+    """ Returns the word-polarity table, built from the TextBlob
+        lexicon on first call:
+            {word : (polarity, intensity, is_modifier)}
+        where 'is_modifier' means that the word modifies the
+        intensity of the next known word (adverbs, "very").
+    """
+    global __table
+    if __table is None:
+        textblob_lexicon.load()
+        table = {}
+        for word, tags in dict.items(textblob_lexicon):
+            if None not in tags: continue
+            polarity, _, intensity = tags[None]
+            is_modifier = any(tag in tags for tag in MODIFIER_TAGS)
+            table[word] = (polarity, intensity, is_modifier)
+        __table = table
+    return __table
+
+
+@functools.lru_cache(maxsize=65536)
+def get_token_entry(token:str) -> tuple:
+    "Memoized get_table() lookup of 'token' (lower-cased); None if unknown."
+    return get_table().get(token.lower())
+
+
+def get_polarity(content:str) -> float:
+    """ Polarity of 'content', between -1.0 and 1.0; the average of
+        the polarity of known words, with modifiers and negations
+        applied in the same way as TextBlob.
+    """
+    assessments = [] # // [polarity, intensity, negated]
+    modifier = None  # // Preceding modifier word.
+    negation = None  # // Preceding negation word.
+    for word in content.split():
+        word = word.lower()
+        entry = get_token_entry(word)
+        if entry is not None:
+            polarity, intensity, is_modifier = entry
+            if modifier is None:
+                assessments.append([polarity, intensity, False])
+            else:
+                last = assessments[-1]
+                last[0] = max(-1.0, min(polarity * last[1], +1.0))
+                last[1] = intensity
+            if negation is not None:
+                assessments[-1][1] = 1.0 / assessments[-1][1]
+                assessments[-1][2] = True
+            modifier = word if is_modifier else None
+            negation = word if word in NEGATIONS else None
+        else:
+            if word in NEGATIONS: negation = word
+            # // Retain negation across small words ("not a good").
+            elif negation and len(word.strip("'")) > 1: negation = None
+            # // Negation preceded by a modifier ("really not good").
+            if negation is not None and modifier is not None \
+                    and textblob_lexicon.modifier(modifier):
+                assessments[-1][2] = True
+                negation = None
+            # // Retain modifier across small words ("really is a good").
+            elif modifier and len(word) > 2: modifier = None
+
+    # // "not good" = slightly bad, "not bad" = slightly good.
+    total = 0
+    for polarity, _, negated in assessments:
+        total += polarity * -0.5 if negated else polarity
+    return total / float(len(assessments) or 1)
@@ -104,7 +104,7 @@ class GenerateDataset():
         # // Setup stream
         api_pipe = FeedFromAPIPipe(
             track=self.track_keywords,
-            threshold_output=200,
+            threshold_output=None, # // Cleared on each slice save.
             verbosity=False
         )
         queue_stream = api_pipe.output
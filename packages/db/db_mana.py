@@ -1,5 +1,5 @@
 from packages.db.db_tools import GDBCom
-from packages.similarity.process_tools import ProcessSimilarity
+from packages.similarity import registry
 
 from packages.cleaning import data_object_tools # @ deb
 
@@ -71,8 +71,10 @@ class DBMana():
         """ Setting up similarity processing tools. Having its own method
             such that model load is easier to control (loading it every time
             a test occurs can be time consuming).
+            The simitool is shared (packages.similarity.registry), so it
+            has a model only if another user of the registry loaded one.
         """
-        self.simitool = ProcessSimilarity(verbosity=verbosity)
+        self.simitool = registry.get_simitool(load_model=False, verbosity=verbosity)
         #if load_model: self.simitool.load_model("glove-twitter-25") # @ Deprecated 020320
 
 
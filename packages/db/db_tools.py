@@ -97,8 +97,9 @@ class GDBCom():
             ValueError.
         """
         # // Format siminet(see packages.similarity.process_tools), which
-        # // is a 2d list into a string which can be stored in the neo4j DB
-        siminet_formatted = data_object_tools.siminet_to_txt(obj.siminet) 
+        # // is a 2d list or SimiNet, into a (base64 binary) string which
+        # // can be stored in the neo4j DB.
+        siminet_formatted = data_object_tools.encode_siminet(obj.siminet)
         # // Formatted command.
         command = f'''
             CREATE (alias{alias}:level_{level})
@@ -150,7 +151,8 @@ class GDBCom():
         name = neo_node["name"]
         text = neo_node["text"]
         siminet = neo_node["siminet"]
-        siminet = data_object_tools.txt_to_siminet(siminet)
+        # // Reads both the binary and the older text format.
+        siminet = data_object_tools.decode_siminet(siminet)
 
         new_dataobj = DataObj()
         new_dataobj.unique_id = unique_id
@@ -417,7 +419,7 @@ class GDBCom():
         # // Do swaps.
         for i in range(len(objs_old)):
             # // Format siminets such that the database can contain them.
-            siminet_formatted = data_object_tools.siminet_to_txt(
+            siminet_formatted = data_object_tools.encode_siminet(
                                     objs_new[i].siminet
                                 )
             self.print_progress( # // Status update
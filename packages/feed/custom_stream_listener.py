@@ -18,12 +18,14 @@ class CustomStreamListener(StreamListener):
         self.destination = _destination
         self.stream_toggle = _stream_toggle
         self.warn_verbosity = _warn_verbosity
+        self.on_new = None # // Optional callback (no args), called per new tweet.
 
     def on_status(self, status):
         """ Tries to add new tweets to self.destination.
             This can be disabled with self.stream_toggle=False.
         """
         self.destination.append(status) if self.stream_toggle else self.out_warn("Stream OFF")
+        if self.stream_toggle and self.on_new is not None: self.on_new()
 
     def on_error(self, status_code):
         """ Tweepy error callback, only implementation is
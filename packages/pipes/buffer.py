@@ -0,0 +1,263 @@
+import os
+import pickle
+import tempfile
+import threading
+from collections import deque
+
+""" This module contains PipeBuffer, the output buffer of
+    pipes (packages.pipes.collection.base.PipeBase).
+"""
+
+# // Consumed bytes at the start of a spill file before it is compacted.
+SPILL_COMPACT_BYTES = 1024 ** 2
+
+class PipeBuffer():
+
+    """ Bounded FIFO buffer with O(1) operations at both ends
+        (collections.deque), used as PipeBase.output. It has the
+        subset of the list interface which pipes use: append,
+        extend, pop(0), pop(), len, bool, iteration, copy and clear.
+        Thread-safe.
+
+        When an append would exceed 'maxlen', the overflow policy
+        decides what happens:
+            - "drop_oldest": the oldest item is dropped.
+            - "drop_newest": the new item is dropped.
+            - "block": the append waits up to 'block_timeout'
+                seconds for a pop. If the buffer is still full,
+                the item is added anyway (over 'maxlen') and
+                counted in 'overflow_count', up to 'max_overflow'
+                items over 'maxlen' (default: 'maxlen'); beyond
+                that, the oldest item is dropped. Schedulers don't
+                run a pipe with a full blocking output (see
+                self.is_blocking), so backpressure reaches sources
+                they run; producers they can't pause (such as the
+                tweet stream thread) should use a 'block_timeout',
+                see FeedFromAPIPipe.set_overflow_policy.
+            - "spill": the item is pickled to a temporary file
+                (in 'spill_dir'), and read back in order as the
+                buffer drains; nothing is dropped. The consumed
+                start of the file is reclaimed as it drains (see
+                SPILL_COMPACT_BYTES).
+        Counters: 'dropped_count', 'overflow_count', 'spilled_count'.
+    """
+
+    POLICIES = ["drop_oldest", "drop_newest", "block", "spill"]
+
+    def __init__(self,
+                maxlen:int = None,
+                policy:str = "drop_oldest",
+                block_timeout:float = 0.0,
+                spill_dir:str = None,
+                max_overflow:int = None) -> None:
+        """ Init with params:
+                - maxlen: max items in memory, None for no bound.
+                - policy, block_timeout, spill_dir, max_overflow:
+                    see class docstring and self.set_policy.
+        """
+        self.maxlen = maxlen
+        self.__items = deque()
+        self.__condition = threading.Condition()
+        # // Spilled items (newer than self.__items), see self.__spill.
+        self.__spill_file = None
+        self.__spill_offsets = deque()
+        self.dropped_count = 0
+        self.overflow_count = 0
+        self.spilled_count = 0
+        self.set_policy(policy, block_timeout, spill_dir, max_overflow)
+
+
+    def set_policy(self,
+                policy:str,
+                block_timeout:float = 0.0,
+                spill_dir:str = None,
+                max_overflow:int = None) -> None:
+        """ Sets the overflow policy (see class docstring).
+            'block_timeout' and 'max_overflow' are only used by
+            "block"; keep 'block_timeout' 0 when the consumer runs
+            in the same thread as the producer. 'max_overflow' None
+            means 'maxlen'. 'spill_dir' is only used by "spill";
+            None uses the default temporary directory.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Overflow policy must be one of {self.POLICIES}.")
+        with self.__condition:
+            if policy != "spill": self.__unspill_all()
+            self.policy = policy
+            self.block_timeout = block_timeout
+            self.spill_dir = spill_dir
+            self.max_overflow = max_overflow
+
+
+    def is_full(self) -> bool:
+        " Whether items in memory reached self.maxlen. "
+        return self.maxlen is not None and len(self.__items) >= self.maxlen
+
+
+    def is_blocking(self) -> bool:
+        " Whether the policy is 'block' and the buffer is full. "
+        return self.policy == "block" and self.is_full()
+
+
+    def append(self, item) -> None:
+        " Adds 'item' as newest, applying the overflow policy if full. "
+        with self.__condition:
+            if self.__spill_offsets:
+                # // Older items are spilled; keep order.
+                self.__spill(item)
+                return
+            if self.is_full():
+                if self.policy == "drop_oldest":
+                    while self.is_full(): # // Also trims after a policy change.
+                        self.__items.popleft()
+                        self.dropped_count += 1
+                elif self.policy == "drop_newest":
+                    self.dropped_count += 1
+                    return
+                elif self.policy == "block":
+                    if self.block_timeout:
+                        self.__condition.wait_for(
+                            lambda: not self.is_full(), self.block_timeout
+                        )
+                    if self.is_full():
+                        max_overflow = self.maxlen if self.max_overflow is None else self.max_overflow
+                        if len(self.__items) >= self.maxlen + max_overflow:
+                            self.__items.popleft()
+                            self.dropped_count += 1
+                        else:
+                            self.overflow_count += 1
+                elif self.policy == "spill":
+                    self.__spill(item)
+                    return
+            self.__items.append(item)
+
+
+    def extend(self, items) -> None:
+        " Appends each of 'items', see self.append. "
+        for item in items: self.append(item)
+
+
+    def pop(self, index:int = -1):
+        """ Removes and returns the oldest (index 0) or newest
+            (index -1) item. Other indexes raise ValueError,
+            an empty buffer raises IndexError (as a list).
+        """
+        if index not in (0, -1):
+            raise ValueError("PipeBuffer only pops index 0 or -1.")
+        with self.__condition:
+            if index == -1 and self.__spill_offsets:
+                item = self.__unspill(newest=True)
+            elif not self.__items:
+                raise IndexError("pop from empty PipeBuffer")
+            else:
+                item = self.__items.popleft() if index == 0 else self.__items.pop()
+                if self.__spill_offsets: # // Refill from disk.
+                    self.__items.append(self.__unspill(newest=False))
+            self.__condition.notify_all()
+            return item
+
+
+    def popleft(self):
+        " Same as self.pop(0). "
+        return self.pop(0)
+
+
+    def clear(self) -> None:
+        " Removes all items (also spilled ones), without counting drops. "
+        with self.__condition:
+            self.__items.clear()
+            self.__spill_offsets.clear()
+            self.__close_spill()
+            self.__condition.notify_all()
+
+
+    def copy(self) -> list:
+        " Returns all items as a list, oldest first. "
+        with self.__condition:
+            return list(self.__items) + self.__read_spilled()
+
+
+    def __len__(self) -> int:
+        return len(self.__items) + len(self.__spill_offsets)
+
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+    def __iter__(self):
+        " Iterates over a copy, see self.copy. "
+        return iter(self.copy())
+
+
+    def __repr__(self) -> str:
+        return f"PipeBuffer({self.copy()!r}, maxlen={self.maxlen}, policy={self.policy!r})"
+
+
+    def __spill(self, item) -> None:
+        " Pickles 'item' to the end of the spill file. "
+        if self.__spill_file is None:
+            self.__spill_file = tempfile.TemporaryFile(
+                prefix="pipebuffer_", dir=self.spill_dir
+            )
+        self.__spill_file.seek(0, os.SEEK_END)
+        self.__spill_offsets.append(self.__spill_file.tell())
+        pickle.dump(item, self.__spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spilled_count += 1
+
+
+    def __unspill(self, newest:bool):
+        """ Removes and returns the oldest or newest spilled item.
+            The file is truncated when the newest is read, compacted
+            when enough of its start was read (see self.__compact_spill),
+            and closed once no items are left.
+        """
+        offset = self.__spill_offsets.pop() if newest else self.__spill_offsets.popleft()
+        self.__spill_file.seek(offset)
+        item = pickle.load(self.__spill_file)
+        if not self.__spill_offsets: self.__close_spill()
+        elif newest: self.__spill_file.truncate(offset)
+        elif self.__spill_offsets[0] >= SPILL_COMPACT_BYTES: self.__compact_spill()
+        return item
+
+
+    def __compact_spill(self) -> None:
+        """ Moves the unread items to a new spill file, such that the
+            disk space of read ones is freed. Only done when the read
+            part is at least half of the file, so each byte is copied
+            a bounded number of times.
+        """
+        start = self.__spill_offsets[0]
+        end = self.__spill_file.seek(0, os.SEEK_END)
+        if start < end - start: return
+        new_file = tempfile.TemporaryFile(prefix="pipebuffer_", dir=self.spill_dir)
+        self.__spill_file.seek(start)
+        while True:
+            block = self.__spill_file.read(1024 ** 2)
+            if not block: break
+            new_file.write(block)
+        self.__spill_file.close()
+        self.__spill_file = new_file
+        self.__spill_offsets = deque([offset - start for offset in self.__spill_offsets])
+
+
+    def __unspill_all(self) -> None:
+        " Moves all spilled items back into memory (used on policy change). "
+        while self.__spill_offsets:
+            self.__items.append(self.__unspill(newest=False))
+
+
+    def __read_spilled(self) -> list:
+        " Returns the spilled items, without removing them. "
+        items = []
+        for offset in self.__spill_offsets:
+            self.__spill_file.seek(offset)
+            items.append(pickle.load(self.__spill_file))
+        return items
+
+
+    def __close_spill(self) -> None:
+        " Closes (and so deletes) the spill file, if any. "
+        if self.__spill_file is not None:
+            self.__spill_file.close()
+            self.__spill_file = None
@@ -1,4 +1,4 @@
-# // TODO:threshold handling?
+from packages.pipes.buffer import PipeBuffer
 
 class PipeBase():
 
@@ -32,8 +32,10 @@ class PipeBase():
                     Must accept one value, return value will be appended
                     to self.output.
                 - threshold_output: Max data count in self.output.
-                    If this is exceeded, then some of the data
-                    will be removed. Used to control memory usage.
+                    If this is exceeded, then the overflow policy of
+                    self.output applies (by default, the oldest item
+                    is dropped). Used to control memory usage.
+                    None means no bound.
                 - verbosity: whether or not print is done or not 
                     (True might give _a_lot_ of information).
         """ 
@@ -43,7 +45,11 @@ class PipeBase():
         self.verbosity = verbosity
 
         self.previous_pipe = previous_pipe
-        self.output = []
+        # // Bounded deque, see packages.pipes.buffer and self.set_overflow_policy.
+        self.output = PipeBuffer(maxlen=threshold_output)
+        self.__reported_drops = 0 # // Used by self.clear_overflow.
+        # // Called when work arrives from another thread, see self.wakeup.
+        self.wakeup_callback = None
 
 
     def cond_print(self, msg):
@@ -51,12 +57,98 @@ class PipeBase():
         if self.verbosity: 
             print(msg)
 
+    def set_overflow_policy(self,
+                policy:str,
+                block_timeout:float = 0.0,
+                spill_dir:str = None,
+                max_overflow:int = None) -> None:
+        """ Sets what happens when self.output reaches threshold_output;
+            "drop_oldest" (default), "drop_newest", "block" or "spill".
+            See packages.pipes.buffer.PipeBuffer for details.
+        """
+        self.output.set_policy(policy, block_timeout, spill_dir, max_overflow)
+
+
+    def get_output_room(self) -> int:
+        """ Free slots in self.output, None if it has no bound. Pipes
+            which push several items per process() call push at most
+            this many (but at least one), such that a full output
+            doesn't drop their own items.
+        """
+        if self.output.maxlen is None: return None
+        return max(self.output.maxlen - len(self.output), 0)
+
+
+    def get_drop_count(self) -> int:
+        " Count of items dropped from self.output by its overflow policy. "
+        return self.output.dropped_count
+
+
     def clear_overflow(self):
-        "Clears output if it reaches self.__threshold_output"
-        while len(self.output) > self.__threshold_output:
-            self.output.pop(0)
-            self.cond_print( "Length of output list reached"
-                                ", removed oldest item.")
+        """ Reports items dropped from output since the last call.
+            self.output keeps itself within self.__threshold_output
+            (see self.set_overflow_policy), so nothing is removed here.
+        """
+        dropped = self.output.dropped_count - self.__reported_drops
+        if dropped:
+            self.__reported_drops = self.output.dropped_count
+            self.cond_print(f"Length of output list reached"
+                                f", dropped {dropped} item(s).")
+
+
+    def has_work(self) -> bool:
+        """ Whether a call to self.process() would make progress; used
+            by schedulers (packages.pipes.pipeline) to skip idle pipes.
+            By default: previous_pipe has output, or there is no
+            previous_pipe (sources produce on each call), unless
+            self.output is full with the "block" policy.
+            Subclasses with other kinds of work override this.
+        """
+        if self.output.is_blocking(): return False # // Backpressure.
+        if self.previous_pipe is None: return True
+        return bool(self.previous_pipe.output)
+
+
+    def set_wakeup(self, callback) -> None:
+        " Sets a callback (no args) for self.wakeup, None removes it. "
+        self.wakeup_callback = callback
+
+
+    def wakeup(self) -> None:
+        """ Tells the scheduler (if any) that this pipe got work
+            from outside of process(), such as from another thread.
+        """
+        if self.wakeup_callback is not None: self.wakeup_callback()
+
+
+    def get_worker_spec(self) -> list:
+        """ Used by MultiprocessPipeline (packages.pipes.multiprocess) to
+            run this pipe as replicated worker processes. Returns
+            [initializer, initargs, task], where 'initializer'(*initargs)
+            is called once per worker (can be None), and task(dataobj)
+            returns the processed dataobj or None (dropped). All must be
+            module-level functions (picklable).
+            None (default) means this pipe runs in the main process.
+            Raises ValueError if this pipe can't be replicated as it is
+            configured (such as with its own worker pool).
+        """
+        return None
+
+
+    def prepare_worker_item(self, item): # -> DataObj or None
+        """ With worker processes (see self.get_worker_spec): converts
+            'item' from previous_pipe into the dataobj which is sent to
+            a worker; None skips it. Runs in the main process.
+        """
+        return item
+
+
+    def finish_worker_item(self, item): # -> DataObj or None
+        """ With worker processes (see self.get_worker_spec): final
+            touches on a dataobj from a worker before it goes to
+            self.output; None drops it. Runs in the main process.
+        """
+        return item
 
 
     def process(self):
@@ -1,7 +1,27 @@
+import multiprocessing
+
 from packages.pipes.collection.base import PipeBase
 from packages.cleaning import data_object_tools
+from packages.cleaning import custom_stopwords
 from packages.cleaning.basic_cleaner import BasicCleaner
 
+# // Per worker process state for MultiprocessPipeline, see _init_worker.
+_worker_sentiment_range = None
+
+
+def _init_worker(sentiment_range:list) -> None:
+    " Initializer of CleaningPipe worker processes. "
+    global _worker_sentiment_range
+    _worker_sentiment_range = sentiment_range
+    custom_stopwords.get_stopwords() # // Load once, not on the first tweet.
+
+
+def _clean(data_obj): # -> DataObj
+    "Worker task: cleans 'data_obj' in place and returns it, see _init_worker."
+    BasicCleaner.autocleaner_single_pass(data_obj, _worker_sentiment_range, False)
+    return data_obj
+
+
 class CleaningPipe(PipeBase):
 
     """ Cleaning pipe is a subclass of PipeBase and
@@ -13,23 +33,47 @@ class CleaningPipe(PipeBase):
             3 - Perform NLP cleaning.
             4 - Pass result to self.output
 
-        Action done by self.process()
+        Action done by self.process(). With 'batch_size' set,
+        each call takes up to that many items at once and cleans
+        them as one batch, optionally in worker processes.
+        Batches only fill up when items pile up in previous_pipe,
+        as with ThreadedPipeline; the serial Pipeline passes one
+        item per pass from sources like FeedFromDiskPipe.
     """
 
     def __init__(self, 
                 previous_pipe,
                 threshold_output:int = 200,
-                verbosity:bool = False) -> None:
+                verbosity:bool = False,
+                batch_size:int = 1,
+                workers:int = 0,
+                sentiment_range:list = [-1.0,1.0]) -> None:
         """ Setting required values, and passing to super.
             See docstring of the baseclass init docstring
             for parameter details.
+            New param:
+                'batch_size'= max items taken from previous_pipe
+                per process() call, see BasicCleaner.autocleaner_batch.
+                'workers'= number of worker processes which convert
+                and clean batches. 0 cleans in this process. Workers
+                need a 'batch_size' above 1, else ValueError.
+                'sentiment_range'= sets DataObj.valid_sentiment_range,
+                see BasicCleaner.set_sentiment. The default accepts
+                all, so no sentiment is computed.
         """
         super(CleaningPipe, self).__init__(
                 previous_pipe=previous_pipe,
-                process_task=self.__task, 
+                process_task=self.__task_batch if batch_size > 1 else self.__task, 
                 threshold_output=threshold_output,
                 verbosity=verbosity
         )
+        if workers and batch_size < 2:
+            raise ValueError("CleaningPipe workers need a batch_size above 1.")
+        self.sentiment_range = sentiment_range
+        self.batch_size = batch_size
+        self.pool = multiprocessing.Pool(processes=workers) if workers else None
+        # // One chunk per worker and batch.
+        self.chunk_size = max(1, -(-batch_size // workers)) if workers else batch_size
 
 
     def __task(self, item):
@@ -42,8 +86,55 @@ class CleaningPipe(PipeBase):
             by the baseclass to self.output list.
         """
         if item:
-            sentiment_range = [-1.0,1.0]
             new_data_obj = data_object_tools.convert_tweet2dataobj(item)
-            BasicCleaner.autocleaner(new_data_obj, sentiment_range, self.verbosity)
+            BasicCleaner.autocleaner_single_pass(
+                new_data_obj, self.sentiment_range, self.verbosity
+            )
             return new_data_obj
 
+
+    def __task_batch(self, item):
+        """ Batch version of self.__task; takes 'item' plus up to
+            self.batch_size - 1 more items from self.previous_pipe,
+            converts and cleans them in one batch (in the workers, if
+            any) and pushes them to self.output. Takes no more items
+            than self.output has room for (see PipeBase.get_output_room).
+            Returns None, as output is handled here.
+        """
+        if not item: return None
+        items = [item]
+        limit = self.batch_size
+        room = self.get_output_room()
+        if room is not None: limit = min(limit, max(room, 1))
+        previous_output = self.previous_pipe.output
+        while previous_output and len(items) < limit:
+            items.append(previous_output.pop(0))
+        self.output.extend(BasicCleaner.autocleaner_batch(
+            items, self.sentiment_range, self.verbosity,
+            pool=self.pool, chunk_size=self.chunk_size, convert_tweets=True
+        ))
+        return None
+
+
+    def get_worker_spec(self) -> list:
+        """ See PipeBase.get_worker_spec; workers clean dataobjects.
+            Exception: ValueError if this pipe has its own workers.
+        """
+        if self.pool is not None:
+            raise ValueError("A replicated CleaningPipe can't have its own workers; use workers=0.")
+        return [_init_worker, (self.sentiment_range,), _clean]
+
+
+    def prepare_worker_item(self, item): # -> DataObj or None
+        " Converts tweet 'item' to a dataobj, see PipeBase.prepare_worker_item. "
+        if not item: return None
+        return data_object_tools.convert_tweet2dataobj(item)
+
+
+    def close(self) -> None:
+        "Stops worker processes, if any."
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
@@ -1,3 +1,5 @@
+import time
+
 from packages.pipes.collection.base import PipeBase
 from packages.db.db_mana import DBMana
 
@@ -26,7 +28,12 @@ class DBPipe(PipeBase):
                 automatically insert the new node.
     2 : 
         calls db_manager to do sorting. This is done
-        with a generator, which makes it cheap.
+        with a generator, which makes it cheap. A
+        sorting pass (one traversal of the db) runs
+        a step per process() call until it is done;
+        the next pass starts 'sort_interval' seconds
+        later (see self.is_sort_due; schedulers check
+        idle pipes at least every max_idle_wait).
 
 
     Action done automatically by self.process()
@@ -36,7 +43,8 @@ class DBPipe(PipeBase):
                 previous_pipe,
                 start_fresh:bool,
                 threshold_output:int = 200,
-                verbosity:bool = False) -> None:
+                verbosity:bool = False,
+                sort_interval:float = 1.0) -> None:
         """ Initialises with required data; see docstring
             of base class init for more info.
             New param:
@@ -45,8 +53,13 @@ class DBPipe(PipeBase):
                 is no root ring in the db (schema),
                 then a new root ring will be created
                 anyway.
+                'sort_interval'= min seconds between
+                sorting passes, see class docstring.
         """
         self.start_fresh = start_fresh
+        self.sort_interval = sort_interval
+        self.sort_pending = False # // A sorting pass is underway.
+        self.sort_last = None     # // time.monotonic() of the last finished pass.
         self.setup()
 
         super(DBPipe, self).__init__(
@@ -82,6 +95,23 @@ class DBPipe(PipeBase):
 
 
 
+    def has_work(self) -> bool:
+        """ Whether there is input, nodes waiting for insertion, or
+            sorting to do: a pass underway, or due (see class docstring).
+        """
+        if super(DBPipe, self).has_work(): return True
+        if self.start_fresh: return False
+        return bool(self.output) or self.is_sort_due()
+
+
+    def is_sort_due(self) -> bool:
+        """ Whether a sorting step is to be done: a pass is underway,
+            or the last one finished self.sort_interval seconds ago.
+        """
+        if self.sort_pending or self.sort_last is None: return True
+        return time.monotonic() - self.sort_last >= self.sort_interval
+
+
     def __task(self, item):
         """ Does db insertion and db sorting.
             Expects 'item' arg to be dataobj
@@ -112,12 +142,16 @@ class DBPipe(PipeBase):
                 new_obj = self.output.pop()
                 self.db_mana.autoinsertion(new_node=new_obj)
             # // Do sorting.
+            if not self.is_sort_due(): return None
             try:
                 next(self.mana_sort_generator)
-            except StopIteration: # // Reset generator.
+                self.sort_pending = True
+            except StopIteration: # // Reset generator, pass is done.
                 self.mana_sort_generator = self.db_mana.clockwork_traversal(
                     sort=True,
                     continuous=False
                 )
+                self.sort_pending = False
+                self.sort_last = time.monotonic()
         return None
 
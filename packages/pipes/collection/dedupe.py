@@ -0,0 +1,131 @@
+from collections import deque
+from hashlib import blake2b
+
+from packages.pipes.collection.base import PipeBase
+
+""" This module contains DedupePipe, which drops near-duplicate
+    dataobjects (retweets, copy-paste tweets), such that they don't
+    go through siminet creation and db insertion.
+"""
+
+# // One 64 byte blake2b digest per word gives 16 32-bit hashes.
+HASH_COUNT = 16
+
+
+def get_minhash(words) -> tuple:
+    """ MinHash signature of 'words' (unique words of a cleaned text):
+        HASH_COUNT values, each the minimum of one hash function over
+        all words. The share of equal values in the signatures of two
+        texts estimates the Jaccard similarity of their word sets.
+    """
+    signature = None
+    for word in words:
+        digest = blake2b(word.encode("utf-8"), digest_size=HASH_COUNT * 4).digest()
+        hashes = [
+            int.from_bytes(digest[index:index + 4], "big")
+            for index in range(0, HASH_COUNT * 4, 4)
+        ]
+        if signature is None: signature = hashes
+        else: signature = [min(pair) for pair in zip(signature, hashes)]
+    return tuple(signature) if signature else None
+
+
+
+class DedupePipe(PipeBase):
+
+    """ This pipe drops near-duplicates:
+            - Pull dataobj (cleaned) from self.previous_pipe
+            - Compute a MinHash signature of its text (see get_minhash).
+            - Drop it if a dataobj in the sliding window (the last
+                'window' passed dataobjects) has an estimated Jaccard
+                similarity of at least 'threshold'; else pass it to
+                self.output.
+
+        Signatures are split into 'bands' (LSH); only window entries
+        with at least one identical band are compared, so the check
+        does not scan the whole window. Memory is bounded by 'window'.
+
+        Counters: 'seen_count' (all dataobjects), 'suppressed_count'
+        (dropped dataobjects).
+    """
+
+    def __init__(self,
+                previous_pipe,
+                threshold_output:int = 200,
+                verbosity:bool = False,
+                window:int = 1000,
+                threshold:float = 0.7,
+                bands:int = 8) -> None:
+        """ Setting required values, and passing to super.
+            See docstring of base class for more information.
+            New param:
+                'window'= count of recent signatures to match against.
+                'threshold'= min estimated Jaccard similarity (share of
+                shared words) of a near-duplicate. 1.0 drops only
+                dataobjects with the same words.
+                'bands'= LSH bands, must divide HASH_COUNT (16). More
+                bands find more candidates with lower similarity.
+        """
+        super(DedupePipe, self).__init__(
+                previous_pipe=previous_pipe,
+                process_task=self.__task,
+                threshold_output=threshold_output,
+                verbosity=verbosity
+        )
+        if HASH_COUNT % bands: raise ValueError(f"bands must divide {HASH_COUNT}")
+        self.window = window
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = HASH_COUNT // bands
+        self.signatures = deque() # // Sliding window, oldest first.
+        self.buckets = {} # // {(band index, band values) : [signature]}
+        self.seen_count = 0
+        self.suppressed_count = 0
+
+
+    def get_bands(self, signature:tuple) -> list:
+        "Splits 'signature' into self.bands bucket keys."
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+
+    def is_duplicate(self, signature:tuple) -> bool:
+        "Whether the window has a signature with a similarity >= self.threshold."
+        min_equal = self.threshold * HASH_COUNT
+        for key in self.get_bands(signature):
+            for other in self.buckets.get(key, ()):
+                equal = sum([a == b for a, b in zip(signature, other)])
+                if equal >= min_equal: return True
+        return False
+
+
+    def remember(self, signature:tuple) -> None:
+        "Adds 'signature' to the window, evicting the oldest if full."
+        self.signatures.append(signature)
+        for key in self.get_bands(signature):
+            self.buckets.setdefault(key, []).append(signature)
+        if len(self.signatures) > self.window:
+            oldest = self.signatures.popleft()
+            for key in self.get_bands(oldest):
+                bucket = self.buckets[key]
+                bucket.remove(oldest)
+                if not bucket: del self.buckets[key]
+
+
+    def __task(self, item):
+        """ Passes 'item' on, unless it is a near-duplicate
+            (see class docstring). Dataobjects without words
+            are always passed on.
+        """
+        if not item: return None
+        self.seen_count += 1
+        signature = get_minhash(set(item.text.split())) if item.text else None
+        if signature is None: return item
+        if self.is_duplicate(signature):
+            self.suppressed_count += 1
+            self.cond_print(f"Dropped near-duplicate: '{item.text}'")
+            return None
+        self.remember(signature)
+        return item
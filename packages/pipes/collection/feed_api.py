@@ -2,6 +2,10 @@
 from packages.pipes.collection.base import PipeBase
 from packages.feed.tweet_feed import Feed
 
+# // Seconds the stream thread waits for room with the "block" policy.
+STREAM_BLOCK_TIMEOUT = 1.0
+
+
 class FeedFromAPIPipe(PipeBase):
 
     """ This particular class gets tweepy tweets from
@@ -40,12 +44,32 @@ class FeedFromAPIPipe(PipeBase):
         " Sets tweepy stream. See packages.feed for more information. "
         feed = Feed()
         self.listener = feed.live_get_listener(self.output)
+        self.listener.on_new = self.wakeup
         self.stream = feed.live_get_streamer(self.listener, track)
     
+    def set_overflow_policy(self,
+                policy:str,
+                block_timeout:float = None,
+                spill_dir:str = None,
+                max_overflow:int = None) -> None:
+        """ See PipeBase.set_overflow_policy. Schedulers can't pause the
+            stream thread, so with "block" it waits for room itself, up
+            to 'block_timeout' seconds (default STREAM_BLOCK_TIMEOUT)
+            per tweet; past 'max_overflow', the oldest tweets are dropped.
+        """
+        if block_timeout is None: block_timeout = STREAM_BLOCK_TIMEOUT
+        super(FeedFromAPIPipe, self).set_overflow_policy(
+            policy, block_timeout, spill_dir, max_overflow
+        )
+
     def __task(self, element):
         " Redundant, will not be called. "
         return None
 
+    def has_work(self) -> bool:
+        " Never; tweets are added by the stream thread. "
+        return False
+
     def __del__(self):
         " Stops stream on garbage collection. "
         self.stream.disconnect()
\ No newline at end of file
@@ -36,6 +36,7 @@ class FeedFromDiskPipe(PipeBase):
         self.unpickle_generator = self.get_unpickle_generator(
             filepath=filepath
         )
+        self.exhausted = False # // Set when the dataset is fully read.
 
     def get_unpickle_generator(self, filepath:str):
         """ Used to create a generator and add it 
@@ -62,4 +63,9 @@ class FeedFromDiskPipe(PipeBase):
             return next(self.unpickle_generator)
 
         except StopIteration:
-            pass
\ No newline at end of file
+            self.exhausted = True
+
+
+    def has_work(self) -> bool:
+        " Whether there are items left in the dataset (and room for them). "
+        return not self.exhausted and not self.output.is_blocking()
@@ -3,7 +3,8 @@ import websockets
 import threading
 
 from packages.pipes.collection.base import PipeBase
-from packages.similarity.process_tools import ProcessSimilarity
+from packages.pipes.collection.simi import create_siminet_in_worker
+from packages.similarity import registry
 from credentials import pyjs_bridge_ip, pyjs_bridge_port
 
 
@@ -38,13 +39,13 @@ class PyJSBridgePipe(PipeBase):
                 is established.
 
         NOTE 1:
-            This class can autodetect a simitool in 
-            previous_pipe stack (all). It is assumed that
-            SimiPipe(packages.pipes.collection.simi) is
-            in the same pipeline as this class. If this is 
-            not true, and a simitool is not autodetected,
-            then it is created. On creation a w2v model 
-            is loaded, which can take some amount of time.
+            This class gets its simitool from
+            packages.similarity.registry, so it shares the
+            model with SimiPipe(packages.pipes.collection.simi)
+            if that is in the same process. If not, the w2v
+            model is loaded here, which can take some amount
+            of time; with load_model=False, query siminets are
+            created in a short-lived worker process instead.
         NOTE 2:
             This class spawns a thread which uses asyncio
             with WebSockets.
@@ -54,8 +55,12 @@ class PyJSBridgePipe(PipeBase):
     def __init__(self,
                 previous_pipe,
                 query: list,
+                model_name:str = registry.DEFAULT_MODEL,
                 threshold_output:int = 200, 
-                verbosity:bool = False) -> None:
+                verbosity:bool = False,
+                load_model:bool = True,
+                alpha_only:bool = False,
+                max_vocab:int = None) -> None:
         """ Setting required values, and passing to super.
             See docstring of base class for more information.
 
@@ -64,6 +69,14 @@ class PyJSBridgePipe(PipeBase):
                 are compared against the siminets in dataobjs 
                 pulled from self.previous_pipe. See class
                 docstring for more information.
+                'model_name'= w2v model used for query siminets,
+                see packages.similarity.registry.
+                'load_model'= False keeps the model out of this
+                process (see class docstring); for runtimes with
+                worker processes.
+                'alpha_only', 'max_vocab'= use a pruned copy of the
+                model, see ProcessSimilarity.load_model. Should match
+                the SimiPipe which makes the compared siminets.
         """
 
         super(PyJSBridgePipe, self).__init__(
@@ -75,30 +88,28 @@ class PyJSBridgePipe(PipeBase):
 
         self.query_queued = query # // For queries waiting to be transformed.
         self.query_ready = []   # // Transformed queries (siminets)
-        self.set_simitool()
+        self.model_name = model_name
+        self.alpha_only = alpha_only
+        self.max_vocab = max_vocab
+        self.load_model = load_model
+        self.set_simitool(model_name)
+        # // Without the model, the query siminet is made by a worker
+        # // process; do that now, before any pipeline threads run.
+        if not load_model: self.check_query_update()
         self.foreign_data_queue = []
         self.thread_active = False # // Used to spawn thread exactly once.
 
 
-    def set_simitool(self):
-        prev_pipe = self.previous_pipe
-        # // Going through stack.
-        while True:
-            # // Going through properties.
-            for key in prev_pipe.__dict__.keys():
-                inst = prev_pipe.__dict__.get(key)
-                # // Find ProcessSimilarity and check for w2v model.
-                if isinstance(inst, (ProcessSimilarity)):
-                    if inst.w2v_model:
-                        self.simitool = inst
-                        return
-            # // Update.
-            if prev_pipe.previous_pipe:
-                prev_pipe = prev_pipe.previous_pipe
-        # // If no simitool was found, make one.
-        if not self.simitool:
-            self.simitool = ProcessSimilarity()
-            self.simitool.load_model()
+    def set_simitool(self, model_name:str = registry.DEFAULT_MODEL):
+        """ Gets the shared simitool from the registry; with a loaded
+            model, unless self.load_model is unset.
+        """
+        self.simitool = registry.get_simitool(
+            name=model_name,
+            alpha_only=self.alpha_only,
+            max_vocab=self.max_vocab,
+            load_model=self.load_model
+        )
 
 
     def start(self):
@@ -148,9 +159,19 @@ class PyJSBridgePipe(PipeBase):
         if type(self.query_queued) is not list: raise ValueError("query must be a list")
         if self.query_queued:
             if self.confirm_str_lst(self.query_queued):
-                self.query_ready = self.simitool.get_similarity_net(
-                    query=self.query_queued
-                )
+                if self.simitool.w2v_model is None:
+                    self.query_ready = create_siminet_in_worker(
+                        {
+                            "name": self.model_name,
+                            "alpha_only": self.alpha_only,
+                            "max_vocab": self.max_vocab
+                        },
+                        self.query_queued
+                    )
+                else:
+                    self.query_ready = self.simitool.get_similarity_net(
+                        query=self.query_queued
+                    )
                 self.query_queued.clear()
 
 
@@ -190,6 +211,14 @@ class PyJSBridgePipe(PipeBase):
         return None
 
 
+    def has_work(self) -> bool:
+        """ Whether there is input; also before the first process()
+            call, such that the websockets thread starts right away.
+        """
+        if not self.thread_active: return True
+        return super(PyJSBridgePipe, self).has_work()
+
+
     def __del__(self):
         "Stops event loop of asyncio on de-ref."
         asyncio.get_event_loop().stop()
\ No newline at end of file
@@ -1,5 +1,59 @@
+import multiprocessing
+import multiprocessing.util
+from collections import deque
+
 from packages.pipes.collection.base import PipeBase
-from packages.similarity.process_tools import ProcessSimilarity
+from packages.similarity import registry
+from packages.similarity.siminet import SimiNet
+
+# // Per worker process state for parallel SimiPipe, see _init_worker.
+_worker_simitool = None
+_worker_settings = None
+
+
+def _init_worker(registry_kwargs:dict, neighbour_table:str, settings:dict) -> None:
+    """ Initializer of SimiPipe worker processes; gets the simitool
+        from the registry of the worker (models load memory-mapped,
+        so workers share one physical copy of the vectors).
+        'registry_kwargs' are kwargs for registry.get_simitool (see
+        SimiPipe.get_registry_kwargs), 'settings' are kwargs for
+        get_similarity_net. With a cache path, the neighbour cache
+        is saved when the worker exits normally.
+    """
+    global _worker_simitool, _worker_settings
+    _worker_simitool = registry.get_simitool(**registry_kwargs)
+    if registry_kwargs.get("cache_path"):
+        # // atexit does not run in worker processes; this does.
+        multiprocessing.util.Finalize(None, _worker_simitool.save_cache, exitpriority=10)
+    if neighbour_table and _worker_simitool.neighbour_table is None:
+        _worker_simitool.load_neighbour_table(neighbour_table)
+    _worker_settings = settings
+
+
+def _get_siminet(query:list) -> list:
+    "Worker task: siminet (list format) for 'query', see _init_worker."
+    return _worker_simitool.get_similarity_net(query=query, **_worker_settings)
+
+
+def _attach_siminet(data_obj): # -> DataObj
+    "Worker task: sets the siminet (list format) of 'data_obj' and returns it."
+    data_obj.siminet = _get_siminet(data_obj.text.split())
+    return data_obj
+
+
+def create_siminet_in_worker(registry_kwargs:dict, query:list, settings:dict = None) -> list:
+    """ Creates one siminet (list format) for 'query' in a short-lived
+        worker process (see _init_worker for params; no 'settings' uses
+        the defaults), such that this process does not need to load
+        the model.
+    """
+    settings = settings or {}
+    with multiprocessing.Pool(
+            processes=1,
+            initializer=_init_worker,
+            initargs=(registry_kwargs, None, settings)) as pool:
+        return pool.apply(_get_siminet, (query,))
+
 
 class SimiPipe(PipeBase):
 
@@ -14,9 +68,15 @@ class SimiPipe(PipeBase):
             siminet= A tree structure composed of related words.
                         created at: packages.similarity.process_tools
             simitool= Instance which creates siminets.
+
+        With 'workers' set, siminets are created by a pool of
+        worker processes instead, each with its own simitool.
+        Dataobjects are then sent off as they come, and collected
+        when their siminet is done; see self.__task_parallel.
     
-        NOTE: An init of this class will create an instance
-            of simitool. This will load a w2v model, which 
+        NOTE: An init of this class gets the shared simitool
+            of its model from packages.similarity.registry. The
+            first one in a process loads the w2v model, which
             can take a while.
     """
     
@@ -24,24 +84,124 @@ class SimiPipe(PipeBase):
                 previous_pipe,
                 threshold_output:int = 200,
                 verbosity:bool = False,
-                recursion_level:int = True) -> None:
+                recursion_level:int = True,
+                model_name:str = registry.DEFAULT_MODEL,
+                alpha_only:bool = False,
+                max_vocab:int = None,
+                cache_path:str = None,
+                neighbour_table:str = None,
+                max_nodes:int = None,
+                beam_width:int = None,
+                min_similarity:float = None,
+                time_limit:float = None,
+                compact_siminets:bool = True,
+                workers:int = 0,
+                ordered:bool = True,
+                max_pending:int = None,
+                load_model:bool = True) -> None:
         """ Setting required values, and passing to super.
             See docstring of base class for more information.
+            New param:
+                'model_name'= w2v model used for siminets, shared
+                with all other users of that model in this process
+                (see packages.similarity.registry).
+                'alpha_only', 'max_vocab'= use a pruned copy of the
+                model, see ProcessSimilarity.load_model.
+                'cache_path'= file used to persist the neighbour
+                cache of the simitool, such that a restarted pipe
+                starts with a warm cache. None disables persistence.
+                Only applies if this pipe is the first user of the model.
+                'neighbour_table'= location of a precomputed neighbour
+                table (see packages.similarity.neighbour_table), used
+                instead of live w2v queries if set.
+                'max_nodes', 'beam_width', 'min_similarity' and
+                'time_limit'= per tweet budget for siminet creation,
+                see ProcessSimilarity.get_similarity_net. None means
+                no cap. Used to keep a latency ceiling per tweet.
+                'compact_siminets'= attach siminets as SimiNet
+                (packages.similarity.siminet) instead of the list
+                format, which uses several times less memory while
+                dataobjects wait in output lists.
+                'workers'= number of worker processes which create
+                siminets. 0 creates them in this process.
+                'ordered'= with workers, whether dataobjects are
+                passed on in the order they came in (True), or as
+                soon as their siminet is done (False).
+                'max_pending'= with workers, max dataobjects sent
+                off at once (default 4 per worker); once reached,
+                this pipe waits for the oldest before taking more.
+                'load_model'= False skips loading the model in this
+                process until the first siminet is created here; for
+                runtimes with worker processes (see self.get_worker_spec).
 
             NOTE: Beware; loads simitool with a word2vec model.
             See class docstring for more information.
         """
         super(SimiPipe, self).__init__(
                 previous_pipe=previous_pipe,
-                process_task=self.__task,
+                process_task=self.__task_parallel if workers else self.__task,
                 threshold_output=threshold_output,
                 verbosity=verbosity
         )
+        self.recursion_level = recursion_level
+        self.max_nodes = max_nodes
+        self.beam_width = beam_width
+        self.min_similarity = min_similarity
+        self.time_limit = time_limit
+        self.compact_siminets = compact_siminets
+        self.ordered = ordered
+        self.pending = deque() # // [dataobj, AsyncResult], oldest first.
+        self.max_pending = max_pending if max_pending else workers * 4
+        self.model_name = model_name
+        self.alpha_only = alpha_only
+        self.max_vocab = max_vocab
+        self.cache_path = cache_path
+        self.neighbour_table = neighbour_table
+
+        if workers:
+            # // Model loads in workers only; this process does not need it.
+            self.simitool = None
+            self.pool = multiprocessing.Pool(
+                processes=workers,
+                initializer=_init_worker,
+                initargs=(self.get_registry_kwargs(), neighbour_table, self.get_settings())
+            )
+            return
+        self.pool = None
+        self.simitool = None
+        if load_model: self.set_simitool()
+
+
+    def set_simitool(self) -> None:
+        " Gets the shared simitool from the registry (might load the model). "
         # // Setup and load tools (model load might take a few seconds).
-        self.simitool = ProcessSimilarity(verbosity=verbosity)
-        self.simitool.load_model()
+        self.simitool = registry.get_simitool(**self.get_registry_kwargs())
+        if self.neighbour_table and self.simitool.neighbour_table is None:
+            self.simitool.load_neighbour_table(self.neighbour_table)
 
-        self.recursion_level = recursion_level
+
+    def get_registry_kwargs(self) -> dict:
+        """ Returns the kwargs for registry.get_simitool, here and in
+            worker processes: the model and the simitool settings.
+        """
+        return {
+            "name": self.model_name,
+            "alpha_only": self.alpha_only,
+            "max_vocab": self.max_vocab,
+            "verbosity": self.verbosity,
+            "cache_path": self.cache_path
+        }
+
+
+    def get_settings(self) -> dict:
+        "Returns the kwargs used for ProcessSimilarity.get_similarity_net."
+        return {
+            "max_recursion": self.recursion_level,
+            "max_nodes": self.max_nodes,
+            "beam_width": self.beam_width,
+            "min_similarity": self.min_similarity,
+            "time_limit": self.time_limit
+        }
 
 
     def __task(self, item):
@@ -58,9 +218,116 @@ class SimiPipe(PipeBase):
         if item.text == None:
             raise ValueError("Expected DataObject.text, found None")
         query = item.text.split()
-        item.siminet = self.simitool.get_similarity_net(
-            query=query,
-            max_recursion=self.recursion_level
+        if self.simitool is None: self.set_simitool()
+        return self.attach_siminet(
+            item, self.simitool.get_similarity_net(query=query, **self.get_settings())
         )
+
+
+    def get_worker_spec(self) -> list:
+        """ See PipeBase.get_worker_spec; workers create siminets,
+            each with the simitool of its own registry.
+            Exception: ValueError if this pipe has its own workers.
+        """
+        if self.pool is not None:
+            raise ValueError("A replicated SimiPipe can't have its own workers; use workers=0.")
+        return [
+            _init_worker, (self.get_registry_kwargs(), self.neighbour_table, self.get_settings()),
+            _attach_siminet
+        ]
+
+
+    def prepare_worker_item(self, item): # -> DataObj or None
+        " See PipeBase.prepare_worker_item. "
+        if not item: return None
+        if item.text == None:
+            raise ValueError("Expected DataObject.text, found None")
         return item
-        
\ No newline at end of file
+
+
+    def finish_worker_item(self, item): # -> DataObj or None
+        " Sets the siminet format of this pipe, see PipeBase.finish_worker_item. "
+        if not isinstance(item.siminet, SimiNet):
+            return self.attach_siminet(item, item.siminet)
+        if not self.compact_siminets: item.siminet = item.siminet.to_list()
+        return item
+
+
+    def attach_siminet(self, item, siminet:list):
+        "Sets 'siminet' (list format) on dataobj 'item', returns 'item'."
+        if self.compact_siminets and siminet is not None:
+            siminet = SimiNet.from_list(siminet)
+        item.siminet = siminet
+        return item
+
+
+    def __task_parallel(self, item):
+        """ Parallel version of self.__task (see class docstring):
+            sends 'item' off to the worker pool, and moves dataobjects
+            with a finished siminet to self.output. Returns None, as
+            output is handled here.
+
+            NOTE: will crash if dataobjects do not have
+                valid text fields, or if a worker raises.
+        """
+        if item:
+            if item.text == None:
+                raise ValueError("Expected DataObject.text, found None")
+            # // Backpressure; wait for the oldest before sending more.
+            if len(self.pending) >= self.max_pending: self.pending[0][1].wait()
+            result = self.pool.apply_async(
+                _get_siminet, (item.text.split(),),
+                callback=self.__on_done, error_callback=self.__on_done
+            )
+            self.pending.append([item, result])
+        self.collect_done()
+        return None
+
+
+    def __on_done(self, _) -> None:
+        " Pool callback (result thread); a siminet is done. "
+        self.wakeup()
+
+
+    def has_work(self) -> bool:
+        " Whether there is input, or a finished siminet to collect. "
+        if super(SimiPipe, self).has_work(): return True
+        if not self.pending or self.output.is_blocking(): return False
+        if self.ordered: return self.pending[0][1].ready()
+        return any([result.ready() for _, result in self.pending])
+
+
+    def collect_done(self) -> None:
+        """ Moves dataobjects with a finished siminet from
+            self.pending to self.output; with self.ordered,
+            only as long as the oldest one is done. Moves no more
+            than self.output has room for (at least one, see
+            PipeBase.get_output_room); the rest waits in self.pending.
+        """
+        room = self.get_output_room()
+        limit = len(self.pending) if room is None else max(room, 1)
+        if self.ordered:
+            while limit and self.pending and self.pending[0][1].ready():
+                item, result = self.pending.popleft()
+                self.output.append(self.attach_siminet(item, result.get()))
+                limit -= 1
+            return
+        still_pending = deque()
+        for item, result in self.pending:
+            if limit and result.ready():
+                self.output.append(self.attach_siminet(item, result.get()))
+                limit -= 1
+            else:
+                still_pending.append([item, result])
+        self.pending = still_pending
+
+
+    def close(self) -> None:
+        """ Stops worker processes, if any. Dataobjects which
+            are still pending are dropped.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.pending.clear()
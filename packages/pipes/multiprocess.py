@@ -0,0 +1,270 @@
+import threading
+import multiprocessing
+
+from packages.cleaning import data_object_tools
+from packages.pipes.pipeline import ThreadedPipeline
+
+""" This module contains MultiprocessPipeline, a pipeline runtime where
+    CPU-bound pipes run as replicated worker processes. See docstring
+    of that class for more information.
+"""
+
+def _run_worker(spec:list, task_queue, result_queue) -> None:
+    """ Worker process of a replicated pipe; 'spec' is from
+        PipeBase.get_worker_spec. Runs the initializer once (such as
+        a model load), then processes chunks from 'task_queue' until
+        a None sentinel, which is answered with None on 'result_queue'.
+
+        Messages are lists of [sequence number, values] (tasks) and
+        [sequence number, values, error] (results), where values are
+        dataobjects as compact tuples (data_object_tools.dataobj_to_tuple),
+        or None if dropped. Errors are strings, None if all went well.
+    """
+    initializer, initargs, task = spec
+    if initializer is not None: initializer(*initargs)
+    while True:
+        chunk = task_queue.get()
+        if chunk is None: break
+        results = []
+        for sequence, values in chunk:
+            try:
+                data_obj = task(data_object_tools.tuple_to_dataobj(values))
+                if data_obj is not None:
+                    data_obj = data_object_tools.dataobj_to_tuple(data_obj)
+                results.append([sequence, data_obj, None])
+            except Exception as error:
+                results.append([sequence, None, f"{type(error).__name__}: {error}"])
+        result_queue.put(results)
+    result_queue.put(None)
+
+
+
+class WorkerStage():
+
+    """ Worker processes of one replicated pipe (see
+        MultiprocessPipeline), with their queues and the
+        bookkeeping for in-flight dataobjects.
+    """
+
+    def __init__(self, spec:list, workers:int, max_pending:int) -> None:
+        " Init with a spec of PipeBase.get_worker_spec. "
+        self.task_queue = multiprocessing.Queue()
+        self.result_queue = multiprocessing.Queue()
+        self.processes = [
+            multiprocessing.Process(
+                target=_run_worker,
+                args=(spec, self.task_queue, self.result_queue),
+                daemon=True
+            )
+            for _ in range(workers)
+        ]
+        self.max_pending = max_pending
+        self.lock = threading.Lock() # // Guards self.in_flight.
+        self.in_flight = 0           # // Dataobjects sent, not collected.
+        self.next_sequence = 0 # // Sequence number of the next task.
+        self.next_output = 0   # // Sequence number of the next output (ordered).
+        self.done = {}         # // {sequence number : dataobj or None}
+        self.collector = None  # // Thread, see MultiprocessPipeline.run_collector.
+        self.closed = False
+
+
+    def has_room(self, output, limit_output:bool) -> bool:
+        """ Whether another dataobject can be sent: less than
+            self.max_pending in flight and, with 'limit_output',
+            room for it in 'output' (PipeBuffer) once it is done.
+        """
+        with self.lock:
+            if self.in_flight >= self.max_pending: return False
+            if not limit_output or output.maxlen is None: return True
+            return len(output) + self.in_flight < output.maxlen
+
+
+
+class MultiprocessPipeline(ThreadedPipeline):
+
+    """ Runtime alternative to Pipeline and ThreadedPipeline, with the
+        same pipes. Pipes which support it (PipeBase.get_worker_spec;
+        CleaningPipe and SimiPipe) run as 'workers' replicated worker
+        processes each, such that CPU-bound work uses several cores.
+        Other pipes (sources, dedupe, db, websockets) run in threads
+        of this process, as in ThreadedPipeline.
+
+        For each replicated pipe, a dispatcher thread (in place of
+        the pipe thread) takes items from previous_pipe, converts them
+        with PipeBase.prepare_worker_item and sends them off in chunks
+        (up to 'chunk_size'), and a collector thread puts results into
+        the output of the pipe. Dataobjects travel as compact tuples
+        with binary siminets (see data_object_tools.dataobj_to_tuple)
+        through multiprocessing queues (pipes), so no tweepy objects or
+        SimiNet internals are pickled.
+            - Startup: each worker runs the initializer of the pipe once
+                (SimiPipe workers load the model, memory-mapped, so they
+                share one physical copy). Specs are taken at init, so a
+                pipe which can't be replicated (such as one with its own
+                worker pool, workers > 0) raises ValueError there.
+            - Ordering: with 'ordered', dataobjects are passed on in the
+                order they came in (by sequence number); else as they
+                are done.
+            - Backpressure: at most 'max_pending' dataobjects per pipe
+                are in flight.
+            - Shutdown (self.stop): dispatching stops, workers finish the
+                tasks already sent, and their results are collected
+                before workers exit.
+
+        NOTE: Replicated pipes are not processed in this process; create
+            them without loading heavy tools (SimiPipe(load_model=False)).
+            Other pipes still load what they use here: PyJSBridgePipe
+            needs the model for its query siminet, unless created with
+            load_model=False (the query siminet is then made in a
+            short-lived worker process). The prefabs do both for this
+            runtime.
+    """
+
+    def __init__(self,
+                pipes:list,
+                workers:int = 2,
+                ordered:bool = True,
+                chunk_size:int = 16,
+                max_pending:int = None,
+                monitor_interval:float = 0.5,
+                min_idle_wait:float = 0.001,
+                max_idle_wait:float = 0.5) -> None:
+        """ Params as Pipeline.__init__, and:
+                'workers'= worker processes per replicated pipe.
+                'ordered', 'chunk_size', 'max_pending'= see class
+                docstring; 'max_pending' defaults to two chunks per
+                worker.
+        """
+        super(MultiprocessPipeline, self).__init__(
+            pipes=pipes,
+            monitor_interval=monitor_interval,
+            min_idle_wait=min_idle_wait,
+            max_idle_wait=max_idle_wait
+        )
+        if workers < 1: raise ValueError("workers must be at least 1.")
+        self.workers = workers
+        self.ordered = ordered
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending if max_pending else workers * chunk_size * 2
+        self.specs = {} # // {pipe index : PipeBase.get_worker_spec()} of replicated pipes.
+        for index, pipe in enumerate(pipes):
+            spec = pipe.get_worker_spec() if pipe.previous_pipe else None
+            if spec is not None: self.specs[index] = spec
+        self.stages = {} # // {pipe index : WorkerStage}, see self.start.
+
+
+    def start(self) -> None:
+        """ Starts worker processes and collector threads of all
+            replicated pipes, then the pipe threads.
+        """
+        self.stop_signal.clear()
+        self.stages = {}
+        for index, spec in self.specs.items():
+            pipe = self.pipes[index]
+            stage = WorkerStage(spec, self.workers, self.max_pending)
+            self.stages[index] = stage
+            for process in stage.processes: process.start()
+            stage.collector = threading.Thread(
+                target=self.run_collector, args=(index,), daemon=True,
+                name=f"collector-{index}-{pipe.__class__.__name__}"
+            )
+            stage.collector.start()
+        super(MultiprocessPipeline, self).start()
+
+
+    def run_pipe(self, index:int) -> None:
+        " Thread target; dispatcher for replicated pipes, else as ThreadedPipeline. "
+        if index not in self.stages:
+            super(MultiprocessPipeline, self).run_pipe(index)
+            return
+        try:
+            self.run_dispatcher(index)
+        except Exception as error:
+            self.errors.append(error)
+            self.stop_signal.set()
+
+
+    def run_dispatcher(self, index:int) -> None:
+        """ Sends items from previous_pipe of replicated pipe 'index'
+            to its workers (see class docstring), until self.stop.
+        """
+        pipe = self.pipes[index]
+        stage = self.stages[index]
+        signal = self.signals[index]
+        limit_output = index < len(self.pipes) - 1 # // As ThreadedPipeline.is_ready.
+        idle_wait = self.min_idle_wait
+        while not self.stop_signal.is_set():
+            chunk = []
+            previous_output = pipe.previous_pipe.output
+            while previous_output and len(chunk) < self.chunk_size \
+                    and stage.has_room(pipe.output, limit_output):
+                data_obj = pipe.prepare_worker_item(previous_output.pop(0))
+                if data_obj is None: continue
+                chunk.append([
+                    stage.next_sequence, data_object_tools.dataobj_to_tuple(data_obj)
+                ])
+                stage.next_sequence += 1
+                with stage.lock: stage.in_flight += 1
+            if chunk:
+                stage.task_queue.put(chunk)
+                self.notify_neighbours(index) # // Room upstream.
+                idle_wait = self.min_idle_wait
+            elif signal.wait(idle_wait):
+                idle_wait = self.min_idle_wait
+            else:
+                idle_wait = min(idle_wait * 2, self.max_idle_wait)
+
+
+    def run_collector(self, index:int) -> None:
+        """ Thread target; moves results of the workers of replicated
+            pipe 'index' to its output (see class docstring), until
+            all workers exited. Worker errors stop the pipeline.
+        """
+        pipe = self.pipes[index]
+        stage = self.stages[index]
+        exited = 0
+        while exited < len(stage.processes):
+            results = stage.result_queue.get()
+            if results is None:
+                exited += 1
+                continue
+            for sequence, values, error in results:
+                if error is not None:
+                    self.errors.append(ValueError(
+                        f"{pipe.__class__.__name__} worker failed: {error}"
+                    ))
+                    self.stop_signal.set()
+                    values = None
+                data_obj = None
+                if values is not None:
+                    data_obj = pipe.finish_worker_item(
+                        data_object_tools.tuple_to_dataobj(values)
+                    )
+                if self.ordered: stage.done[sequence] = data_obj
+                elif data_obj is not None: pipe.output.append(data_obj)
+                if not self.ordered:
+                    with stage.lock: stage.in_flight -= 1
+            while stage.next_output in stage.done:
+                data_obj = stage.done.pop(stage.next_output)
+                stage.next_output += 1
+                if data_obj is not None: pipe.output.append(data_obj)
+                with stage.lock: stage.in_flight -= 1
+            self.notify_neighbours(index)
+
+
+    def stop(self, timeout:float = 10.0) -> None:
+        """ Stops pipe threads (see ThreadedPipeline.stop), then
+            worker processes: each finishes the tasks it was sent,
+            whose results are collected, and exits. Workers still
+            running after 'timeout' seconds are terminated.
+        """
+        super(MultiprocessPipeline, self).stop(timeout)
+        current = threading.current_thread()
+        for stage in self.stages.values():
+            if stage.closed: continue
+            stage.closed = True
+            for _ in stage.processes: stage.task_queue.put(None)
+            if stage.collector is not current: stage.collector.join(timeout)
+            for process in stage.processes:
+                process.join(timeout)
+                if process.is_alive(): process.terminate()
@@ -1,8 +1,43 @@
-""" This primary function of this module is 
-    to contain the 'Pipeline' class. See 
+import time
+import threading
+
+""" This primary function of this module is
+    to contain the 'Pipeline' class. See
     docstring of that class for more information.
 """
 
+class Signal():
+
+    """ Wakeup signal between threads: wait() returns when
+        notify() was called (since the last wait) or on timeout.
+    """
+
+    def __init__(self) -> None:
+        self.condition = threading.Condition()
+        self.pending = False # // Guarded by self.condition.
+
+
+    def notify(self) -> None:
+        " Wakes up a waiting (or the next) self.wait call. Thread-safe. "
+        with self.condition:
+            self.pending = True
+            self.condition.notify_all()
+
+
+    def wait(self, timeout:float) -> bool:
+        """ Waits until self.notify or 'timeout' seconds.
+            Returns True if notified (also if notify came
+            before this call), False on timeout.
+        """
+        with self.condition:
+            if not self.pending:
+                self.condition.wait(timeout)
+            notified = self.pending
+            self.pending = False
+            return notified
+
+
+
 class Pipeline():
 
     """ This class is a container for child classes of
@@ -11,23 +46,61 @@ class Pipeline():
         start a loop which iterates over all contained
         pipes to process and pass their data. Monitor
         included.
+
+        The loop is event-driven: each pass only processes
+        pipes which have work (see PipeBase.has_work). When
+        no pipe has work, the loop sleeps on a Signal until
+        a pipe calls PipeBase.wakeup (work from another thread,
+        such as the tweet stream), or a timeout. Timeouts grow
+        (idle backoff) from 'min_idle_wait' to 'max_idle_wait';
+        after each timeout, all pipes are processed once, for
+        background work like db sorting.
     """
 
-    def __init__(self, pipes:list) -> None:
+    def __init__(self,
+                pipes:list,
+                monitor_interval:float = 0.5,
+                min_idle_wait:float = 0.001,
+                max_idle_wait:float = 0.5) -> None:
         """ init with pipes, where pipes is a list of
             instances of pipe classes. Pipe classes
-            are meant to be childs of 
+            are meant to be childs of
             packages.pipes.collection.base.PipeBase.
+            Params:
+                'monitor_interval'= min seconds between
+                monitor refreshes (see self.minitor_pipes).
+                'min_idle_wait', 'max_idle_wait'= range of
+                the idle backoff, see class docstring.
         """
         self.pipes = pipes
         self.mon_line_length_highscore = 0# // Used for shell cleanup.
+        self.monitor_interval = monitor_interval
+        self.monitor_last = None # // time.monotonic() of last refresh.
+        self.min_idle_wait = min_idle_wait
+        self.max_idle_wait = max_idle_wait
+
+        self.signal = Signal()
+        self.set_wakeups()
+
 
+    def set_wakeups(self) -> None:
+        " Sets the wakeup callback of all pipes, see PipeBase.wakeup. "
+        for pipe in self.pipes: pipe.set_wakeup(self.signal.notify)
 
-    def minitor_pipes(self) -> None:
+
+    def minitor_pipes(self, force:bool = False) -> None:
         """ Writes a line in CLI to visualise
             the content of the pipes collected
             and processed with this class.
+            Does nothing if the last line was written
+            less than self.monitor_interval ago,
+            unless 'force' is set.
         """
+        now = time.monotonic()
+        if not force and self.monitor_last is not None \
+                and now - self.monitor_last < self.monitor_interval:
+            return
+        self.monitor_last = now
         # // Construct string.
         padding_whitespace = 5
         mon_line = ""
@@ -35,7 +108,10 @@ class Pipeline():
             mon_line += self.pipes[n].__class__.__name__ + ": "
             mon_line += str(
                 len(self.pipes[n].output)
-                )  + " " *padding_whitespace
+                )
+            dropped = self.pipes[n].get_drop_count()
+            if dropped: mon_line += f" (dropped {dropped})"
+            mon_line += " " *padding_whitespace
         # // Printout.
         print(
             f"{mon_line}{' '*self.mon_line_length_highscore}",
@@ -46,16 +122,185 @@ class Pipeline():
             self.mon_line_length_highscore = len(mon_line)
 
 
+    def process_ready(self) -> bool:
+        """ Calls pipe.process() on each pipe with work, in
+            pipeline order. Returns whether any pipe had work.
+        """
+        worked = False
+        for pipe in self.pipes:
+            if pipe.has_work():
+                pipe.process()
+                worked = True
+        return worked
+
+
+    def process_all(self) -> None:
+        """ Calls pipe.process() on each pipe, with or without work,
+            except pipes with a full blocking output (backpressure).
+        """
+        for pipe in self.pipes:
+            if not pipe.output.is_blocking(): pipe.process()
+
+
     def run(self) -> None:
         """ Starts a loop which iterates infinitely over
-            all pipes contained in this class. Each iteration
-            will call pipe.process() on each pipe. Monitor
-            is called in this loop as well.
+            all pipes contained in this class, see class
+            docstring. Monitor is called in this loop
+            as well (rate-limited).
         """
+        idle_wait = self.min_idle_wait
         try:
             while True:
-                for pipe in self.pipes:
+                if self.process_ready():
+                    idle_wait = self.min_idle_wait
+                elif self.signal.wait(idle_wait):
+                    idle_wait = self.min_idle_wait
+                else: # // Timeout; background work, then back off.
+                    self.process_all()
+                    idle_wait = min(idle_wait * 2, self.max_idle_wait)
+                self.minitor_pipes()
+        except KeyboardInterrupt:
+            pass
+
+
+
+class ThreadedPipeline(Pipeline):
+
+    """ Runtime alternative to Pipeline, with the same pipes: each
+        pipe runs in its own thread, so blocking I/O (tweet stream,
+        Neo4j round trips, websocket sends) overlaps with compute
+        (SimiPipe) instead of taking turns in one loop. Pipes are
+        connected by their outputs (PipeBuffer, thread-safe and
+        bounded, see packages.pipes.buffer).
+
+        Each thread runs the event-driven loop of Pipeline for its
+        own pipe, with its own Signal. A pipe which processed wakes
+        its neighbours: downstream for new data, upstream for new
+        room. A pipe with a full output does not run until
+        downstream makes room (the last pipe excepted, as nothing
+        reads its output). Pipes which push several items per
+        process() call push no more than the room left in their
+        output (PipeBase.get_output_room), so stages don't drop
+        items because a later stage is slower; overflow policies
+        still apply to items from outside, such as the tweet stream.
+
+        NOTE: The pipes themselves are not locked; each is only
+            processed by its own thread.
+    """
+
+    def __init__(self,
+                pipes:list,
+                monitor_interval:float = 0.5,
+                min_idle_wait:float = 0.001,
+                max_idle_wait:float = 0.5) -> None:
+        " Same params as Pipeline.__init__. "
+        self.signals = [Signal() for _ in pipes] # // Index is pipe index.
+        self.stop_signal = threading.Event()
+        self.threads = []
+        self.errors = [] # // Exceptions raised in pipe threads.
+        super(ThreadedPipeline, self).__init__(
+            pipes=pipes,
+            monitor_interval=monitor_interval,
+            min_idle_wait=min_idle_wait,
+            max_idle_wait=max_idle_wait
+        )
+
+
+    def set_wakeups(self) -> None:
+        """ Sets the wakeup callback of all pipes; a wakeup of a pipe
+            wakes it and its downstream pipe (work from outside, like
+            the tweet stream, is usually for the next pipe).
+        """
+        for index, pipe in enumerate(self.pipes):
+            pipe.set_wakeup(lambda index=index: self.notify_neighbours(index, False))
+
+
+    def notify_neighbours(self, index:int, upstream:bool = True) -> None:
+        """ Wakes pipe 'index' and the pipe after it, plus the
+            pipe before it if 'upstream' is set.
+        """
+        first = index - 1 if upstream else index
+        for signal in self.signals[max(first, 0):index + 2]:
+            signal.notify()
+
+
+    def is_ready(self, index:int) -> bool:
+        """ Whether pipe 'index' has work (PipeBase.has_work)
+            and room in its output for at least one item (pipes
+            which push more respect the room, see class docstring).
+        """
+        pipe = self.pipes[index]
+        if index < len(self.pipes) - 1 and pipe.output.is_full(): return False
+        return pipe.has_work()
+
+
+    def run_pipe(self, index:int) -> None:
+        """ Thread target; event-driven loop (see Pipeline.run) of
+            pipe 'index', until self.stop. Exceptions are stored
+            in self.errors and stop the whole pipeline (see self.run).
+        """
+        pipe = self.pipes[index]
+        signal = self.signals[index]
+        idle_wait = self.min_idle_wait
+        try:
+            while not self.stop_signal.is_set():
+                if self.is_ready(index):
                     pipe.process()
+                    self.notify_neighbours(index)
+                    idle_wait = self.min_idle_wait
+                elif signal.wait(idle_wait):
+                    idle_wait = self.min_idle_wait
+                else: # // Timeout; background work, then back off.
+                    last = index == len(self.pipes) - 1
+                    if last or not pipe.output.is_full():
+                        pipe.process()
+                        self.notify_neighbours(index)
+                    idle_wait = min(idle_wait * 2, self.max_idle_wait)
+        except Exception as error:
+            self.errors.append(error)
+            self.stop_signal.set() # // run() stops the others.
+
+
+    def start(self) -> None:
+        " Starts one (daemon) thread per pipe. "
+        self.stop_signal.clear()
+        self.threads = [
+            threading.Thread(
+                target=self.run_pipe, args=(index,), daemon=True,
+                name=f"pipe-{index}-{pipe.__class__.__name__}"
+            )
+            for index, pipe in enumerate(self.pipes)
+        ]
+        for thread in self.threads: thread.start()
+
+
+    def stop(self, timeout:float = 10.0) -> None:
+        """ Signals all pipe threads to stop, and waits up to 'timeout'
+            seconds for each (not when called from a pipe thread).
+            A thread stops after its current process() call; threads
+            still busy after 'timeout' (such as a SimiPipe waiting on
+            its workers) are left behind, they are daemon threads.
+            None waits without limit.
+        """
+        self.stop_signal.set()
+        for signal in self.signals: signal.notify()
+        current = threading.current_thread()
+        for thread in self.threads:
+            if thread is not current: thread.join(timeout)
+
+
+    def run(self) -> None:
+        """ Starts the pipe threads, then refreshes the monitor
+            until KeyboardInterrupt or an error in a pipe thread,
+            which is raised here after all threads stopped.
+        """
+        self.start()
+        try:
+            while not self.stop_signal.is_set():
                 self.minitor_pipes()
+                self.stop_signal.wait(self.monitor_interval)
         except KeyboardInterrupt:
             pass
+        finally:
+            self.stop() # // Finite timeout; don't hang on exit.
+        if self.errors: raise self.errors[0]
@@ -5,20 +5,65 @@
 
 from packages.pipes.collection.cleaning import CleaningPipe
 from packages.pipes.collection.simi import SimiPipe
+from packages.pipes.collection.dedupe import DedupePipe
 from packages.pipes.collection.feed_disk import FeedFromDiskPipe
 from packages.pipes.collection.feed_api import FeedFromAPIPipe
 from packages.pipes.collection.pyjs_bridge import PyJSBridgePipe
 from packages.pipes.collection.database import DBPipe
 
-from packages.pipes.pipeline import Pipeline
+from packages.pipes.pipeline import Pipeline, ThreadedPipeline
+from packages.pipes.multiprocess import MultiprocessPipeline
 
+# // Pipeline classes by 'runtime' argument of the prefabs.
+RUNTIMES = {
+    "serial": Pipeline,
+    "threaded": ThreadedPipeline,
+    "multiprocess": MultiprocessPipeline
+}
+
+
+def _get_pipeline(pipes:list, overflow_policy:str, runtime:str) -> Pipeline:
+    """ Returns a pipeline of 'pipes' (None entries are skipped,
+        for optional pipes) for 'runtime' (see RUNTIMES), with
+        'overflow_policy' set on all but the last one; no pipe reads
+        its output, so it keeps dropping the oldest items.
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"runtime must be one of {list(RUNTIMES)}.")
+    pipes = [pipe for pipe in pipes if pipe is not None]
+    for pipe in pipes[:-1]: pipe.set_overflow_policy(overflow_policy)
+    return RUNTIMES[runtime](pipes=pipes)
+
+
+def _get_dedupe_pipe(
+        previous_pipe,
+        dedupe:bool,
+        threshold_output:int,
+        verbosity:bool
+    ) -> DedupePipe:
+    """ Returns a DedupePipe after 'previous_pipe' if 'dedupe' is
+        set, else None (skipped by _get_pipeline).
+    """
+    if not dedupe: return None
+    return DedupePipe(
+            previous_pipe=previous_pipe,
+            threshold_output=threshold_output,
+            verbosity=verbosity
+    )
 
 
 def get_pipeline_api_cln_simi_db(
         api_track:list = ["to", "and", "from", "but", "how", "why"],
         rec_lvl:int = 1,
         threshold_output:int = 200,
-        verbosity:bool = False
+        verbosity:bool = False,
+        dedupe:bool = False,
+        overflow_policy:str = "drop_oldest",
+        runtime:str = "serial",
+        batch_size:int = 1,
+        workers:int = 0,
+        alpha_only:bool = False,
+        max_vocab:int = None
     ):
     """ Gets a pipeline instance consisting of
             - FeedFromAPIPipe
@@ -32,6 +77,24 @@ def get_pipeline_api_cln_simi_db(
             - rec_lvl: Recursion lvl for SimiPipe(v2w).
             - threshold_output: Max data cap in each pipe.
             - verbosity: Whether or not pipes are verbose.
+            - dedupe: Whether or not a DedupePipe drops near-duplicates
+                between CleaningPipe and SimiPipe.
+            - overflow_policy: What pipes do when their output reaches
+                threshold_output; see packages.pipes.buffer.PipeBuffer.
+            - runtime: "serial" (Pipeline, one loop), "threaded"
+                (ThreadedPipeline, one thread per pipe) or "multiprocess"
+                (MultiprocessPipeline, CleaningPipe and SimiPipe in
+                worker processes).
+            - batch_size: Max tweets CleaningPipe cleans at once. Only
+                pays off when tweets pile up in front of it, i.e. with
+                the "threaded" runtime; the serial loop hands over one
+                tweet per pass, and "multiprocess" replicates the pipe
+                instead of batching.
+            - workers: Worker processes of CleaningPipe (needs a
+                batch_size above 1, and can't be used with the
+                "multiprocess" runtime).
+            - alpha_only, max_vocab: Use a pruned copy of the w2v
+                model, see ProcessSimilarity.load_model.
 
     """
     api_pipe = FeedFromAPIPipe(
@@ -42,13 +105,25 @@ def get_pipeline_api_cln_simi_db(
     cln_pipe = CleaningPipe(
             previous_pipe=api_pipe,
             threshold_output=threshold_output,
+            verbosity=verbosity,
+            batch_size=batch_size,
+            workers=workers
+    )
+    dedupe_pipe = _get_dedupe_pipe(
+            previous_pipe=cln_pipe,
+            dedupe=dedupe,
+            threshold_output=threshold_output,
             verbosity=verbosity
     )
     simi_pipe = SimiPipe(
-            previous_pipe=cln_pipe,
+            previous_pipe=dedupe_pipe or cln_pipe,
             threshold_output=threshold_output,
             verbosity=verbosity,
-            recursion_level=rec_lvl
+            recursion_level=rec_lvl,
+            alpha_only=alpha_only,
+            max_vocab=max_vocab,
+            # // Workers load the model with the multiprocess runtime.
+            load_model=runtime != "multiprocess"
     )
     db_pipe = DBPipe(
         previous_pipe=simi_pipe,
@@ -56,8 +131,10 @@ def get_pipeline_api_cln_simi_db(
         threshold_output=threshold_output,
         verbosity=verbosity
     )
-    return Pipeline(
-        pipes=[api_pipe, cln_pipe, simi_pipe, db_pipe]
+    return _get_pipeline(
+        pipes=[api_pipe, cln_pipe, dedupe_pipe, simi_pipe, db_pipe],
+        overflow_policy=overflow_policy,
+        runtime=runtime
     )
 
 
@@ -65,7 +142,14 @@ def get_pipeline_dsk_cln_simi_db(
         filepath:str,
         rec_lvl:int = 1,
         threshold_output:int = 200,
-        verbosity:bool = False
+        verbosity:bool = False,
+        dedupe:bool = False,
+        overflow_policy:str = "drop_oldest",
+        runtime:str = "serial",
+        batch_size:int = 1,
+        workers:int = 0,
+        alpha_only:bool = False,
+        max_vocab:int = None
     ):
     """ Gets a pipeline instance consisting of
             - FeedFromDiskPipe
@@ -79,6 +163,24 @@ def get_pipeline_dsk_cln_simi_db(
             - rec_lvl: Recursion lvl for SimiPipe(v2w).
             - threshold_output: Max data cap in each pipe.
             - verbosity: Whether or not pipes are verbose.
+            - dedupe: Whether or not a DedupePipe drops near-duplicates
+                between CleaningPipe and SimiPipe.
+            - overflow_policy: What pipes do when their output reaches
+                threshold_output; see packages.pipes.buffer.PipeBuffer.
+            - runtime: "serial" (Pipeline, one loop), "threaded"
+                (ThreadedPipeline, one thread per pipe) or "multiprocess"
+                (MultiprocessPipeline, CleaningPipe and SimiPipe in
+                worker processes).
+            - batch_size: Max tweets CleaningPipe cleans at once. Only
+                pays off when tweets pile up in front of it, i.e. with
+                the "threaded" runtime; the serial loop hands over one
+                tweet per pass, and "multiprocess" replicates the pipe
+                instead of batching.
+            - workers: Worker processes of CleaningPipe (needs a
+                batch_size above 1, and can't be used with the
+                "multiprocess" runtime).
+            - alpha_only, max_vocab: Use a pruned copy of the w2v
+                model, see ProcessSimilarity.load_model.
     """
     dsk_pipe = FeedFromDiskPipe(
             filepath=filepath,
@@ -88,13 +190,25 @@ def get_pipeline_dsk_cln_simi_db(
     cln_pipe = CleaningPipe(
             previous_pipe=dsk_pipe,
             threshold_output=threshold_output,
+            verbosity=verbosity,
+            batch_size=batch_size,
+            workers=workers
+    )
+    dedupe_pipe = _get_dedupe_pipe(
+            previous_pipe=cln_pipe,
+            dedupe=dedupe,
+            threshold_output=threshold_output,
             verbosity=verbosity
     )
     simi_pipe = SimiPipe(
-            previous_pipe=cln_pipe,
+            previous_pipe=dedupe_pipe or cln_pipe,
             threshold_output=threshold_output,
             verbosity=verbosity,
-            recursion_level=rec_lvl
+            recursion_level=rec_lvl,
+            alpha_only=alpha_only,
+            max_vocab=max_vocab,
+            # // Workers load the model with the multiprocess runtime.
+            load_model=runtime != "multiprocess"
     )
     db_pipe = DBPipe(
         previous_pipe=simi_pipe,
@@ -102,8 +216,10 @@ def get_pipeline_dsk_cln_simi_db(
         threshold_output=threshold_output,
         verbosity=verbosity
     )
-    return Pipeline(
-        pipes=[dsk_pipe, cln_pipe, simi_pipe, db_pipe]
+    return _get_pipeline(
+        pipes=[dsk_pipe, cln_pipe, dedupe_pipe, simi_pipe, db_pipe],
+        overflow_policy=overflow_policy,
+        runtime=runtime
     )
 
 
@@ -112,7 +228,14 @@ def get_pipeline_dsk_cln_simi_js(
         initial_query:list,
         rec_lvl:int = 1,
         threshold_output:int = 200,
-        verbosity:bool = False
+        verbosity:bool = False,
+        dedupe:bool = False,
+        overflow_policy:str = "drop_oldest",
+        runtime:str = "serial",
+        batch_size:int = 1,
+        workers:int = 0,
+        alpha_only:bool = False,
+        max_vocab:int = None
     ):
     """ Gets a pipeline instance consisting of
             - FeedFromDiskPipe
@@ -127,6 +250,24 @@ def get_pipeline_dsk_cln_simi_js(
             - initial_query: Words tracked by system.
             - threshold_output: Max data cap in each pipe.
             - verbosity: Whether or not pipes are verbose.
+            - dedupe: Whether or not a DedupePipe drops near-duplicates
+                between CleaningPipe and SimiPipe.
+            - overflow_policy: What pipes do when their output reaches
+                threshold_output; see packages.pipes.buffer.PipeBuffer.
+            - runtime: "serial" (Pipeline, one loop), "threaded"
+                (ThreadedPipeline, one thread per pipe) or "multiprocess"
+                (MultiprocessPipeline, CleaningPipe and SimiPipe in
+                worker processes).
+            - batch_size: Max tweets CleaningPipe cleans at once. Only
+                pays off when tweets pile up in front of it, i.e. with
+                the "threaded" runtime; the serial loop hands over one
+                tweet per pass, and "multiprocess" replicates the pipe
+                instead of batching.
+            - workers: Worker processes of CleaningPipe (needs a
+                batch_size above 1, and can't be used with the
+                "multiprocess" runtime).
+            - alpha_only, max_vocab: Use a pruned copy of the w2v
+                model, see ProcessSimilarity.load_model.
     """
     dsk_pipe = FeedFromDiskPipe(
             filepath=filepath,
@@ -136,22 +277,39 @@ def get_pipeline_dsk_cln_simi_js(
     cln_pipe = CleaningPipe(
             previous_pipe=dsk_pipe,
             threshold_output=threshold_output,
+            verbosity=verbosity,
+            batch_size=batch_size,
+            workers=workers
+    )
+    dedupe_pipe = _get_dedupe_pipe(
+            previous_pipe=cln_pipe,
+            dedupe=dedupe,
+            threshold_output=threshold_output,
             verbosity=verbosity
     )
     simi_pipe = SimiPipe(
-            previous_pipe=cln_pipe,
+            previous_pipe=dedupe_pipe or cln_pipe,
             threshold_output=threshold_output,
             verbosity=verbosity,
-            recursion_level=rec_lvl
+            recursion_level=rec_lvl,
+            alpha_only=alpha_only,
+            max_vocab=max_vocab,
+            # // Workers load the model with the multiprocess runtime.
+            load_model=runtime != "multiprocess"
     )
     bridge_pipe = PyJSBridgePipe(
         previous_pipe=simi_pipe,
         query=initial_query,
         threshold_output=threshold_output,
-        verbosity=verbosity
+        verbosity=verbosity,
+        load_model=runtime != "multiprocess",
+        alpha_only=alpha_only,
+        max_vocab=max_vocab
     )
-    return Pipeline(
-        pipes=[dsk_pipe, cln_pipe, simi_pipe, bridge_pipe]
+    return _get_pipeline(
+        pipes=[dsk_pipe, cln_pipe, dedupe_pipe, simi_pipe, bridge_pipe],
+        overflow_policy=overflow_policy,
+        runtime=runtime
     )
 
 
@@ -160,7 +318,14 @@ def get_pipeline_api_cln_simi_js(
         initial_query:list = ["python"],
         rec_lvl:int = 1,
         threshold_output:int = 200,
-        verbosity:bool = False
+        verbosity:bool = False,
+        dedupe:bool = False,
+        overflow_policy:str = "drop_oldest",
+        runtime:str = "serial",
+        batch_size:int = 1,
+        workers:int = 0,
+        alpha_only:bool = False,
+        max_vocab:int = None
     ):
     """ Gets a pipeline instance consisting of
             - FeedFromAPIPipe
@@ -174,6 +339,24 @@ def get_pipeline_api_cln_simi_js(
             - initial_query: Words tracked by system.
             - threshold_output: Max data cap in each pipe.
             - verbosity: Whether or not pipes are verbose.
+            - dedupe: Whether or not a DedupePipe drops near-duplicates
+                between CleaningPipe and SimiPipe.
+            - overflow_policy: What pipes do when their output reaches
+                threshold_output; see packages.pipes.buffer.PipeBuffer.
+            - runtime: "serial" (Pipeline, one loop), "threaded"
+                (ThreadedPipeline, one thread per pipe) or "multiprocess"
+                (MultiprocessPipeline, CleaningPipe and SimiPipe in
+                worker processes).
+            - batch_size: Max tweets CleaningPipe cleans at once. Only
+                pays off when tweets pile up in front of it, i.e. with
+                the "threaded" runtime; the serial loop hands over one
+                tweet per pass, and "multiprocess" replicates the pipe
+                instead of batching.
+            - workers: Worker processes of CleaningPipe (needs a
+                batch_size above 1, and can't be used with the
+                "multiprocess" runtime).
+            - alpha_only, max_vocab: Use a pruned copy of the w2v
+                model, see ProcessSimilarity.load_model.
     """
     api_pipe = FeedFromAPIPipe(
         track=api_track,
@@ -183,21 +366,38 @@ def get_pipeline_api_cln_simi_js(
     cln_pipe = CleaningPipe(
             previous_pipe=api_pipe,
             threshold_output=threshold_output,
+            verbosity=verbosity,
+            batch_size=batch_size,
+            workers=workers
+    )
+    dedupe_pipe = _get_dedupe_pipe(
+            previous_pipe=cln_pipe,
+            dedupe=dedupe,
+            threshold_output=threshold_output,
             verbosity=verbosity
     )
     simi_pipe = SimiPipe(
-            previous_pipe=cln_pipe,
+            previous_pipe=dedupe_pipe or cln_pipe,
             threshold_output=threshold_output,
             verbosity=verbosity,
-            recursion_level=rec_lvl
+            recursion_level=rec_lvl,
+            alpha_only=alpha_only,
+            max_vocab=max_vocab,
+            # // Workers load the model with the multiprocess runtime.
+            load_model=runtime != "multiprocess"
     )
     bridge_pipe = PyJSBridgePipe(
         previous_pipe=simi_pipe,
         query=initial_query,
         threshold_output=threshold_output,
-        verbosity=verbosity
+        verbosity=verbosity,
+        load_model=runtime != "multiprocess",
+        alpha_only=alpha_only,
+        max_vocab=max_vocab
     )
-    return Pipeline(
-        pipes=[api_pipe, cln_pipe, simi_pipe, bridge_pipe]
+    return _get_pipeline(
+        pipes=[api_pipe, cln_pipe, dedupe_pipe, simi_pipe, bridge_pipe],
+        overflow_policy=overflow_policy,
+        runtime=runtime
     )
 
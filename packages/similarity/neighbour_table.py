@@ -0,0 +1,104 @@
+import os
+import numpy as np
+
+""" This module contains a precomputed top-k neighbour table for
+    a word2vec model (see packages.similarity.process_tools).
+
+    The model does not change while the pipeline runs, so the
+    neighbours of every vocabulary word can be computed once, offline,
+    with build_neighbour_table(). The table is stored as two .npy files:
+        - '<path>_ids.npy': int32, (vocabulary size, topn),
+            neighbour indexes into the model vocabulary.
+        - '<path>_scores.npy': float32, same shape, confidence scores.
+    Rows are sorted by descending score; padding uses id -1.
+
+    NeighbourTable loads these files memory-mapped (read-only), such
+    that lookups are pure array reads and several processes using the
+    same table share it through the OS page cache.
+"""
+
+def get_table_paths(path:str) -> list:
+    "Returns [ids_path, scores_path] for a table 'path' (prefix)."
+    return [f"{path}_ids.npy", f"{path}_scores.npy"]
+
+
+def build_neighbour_table(simitool,
+                          path:str,
+                          topn:int = 10,
+                          batch_memory:int = 256 * 1024 ** 2) -> None:
+    """ Builds a neighbour table for the model loaded in 'simitool'
+        (packages.similarity.process_tools.ProcessSimilarity) and
+        saves it to 'path' (see module docstring for the format).
+
+        Neighbours are computed with simitool.get_neighbour_ids() in
+        chunks, each capped at 'batch_memory' bytes (see
+        ProcessSimilarity.get_neighbour_chunk_size), and are
+        written straight into memory-mapped output files.
+        NOTE: This is a full vocabulary x vocabulary scan and takes a
+            while (expect hours for glove-twitter-25 on one core).
+    """
+    if simitool.w2v_model is None: raise ValueError("simitool has no model")
+    directory = os.path.dirname(path)
+    if directory: os.makedirs(directory, exist_ok=True)
+
+    vocab_size = len(simitool.w2v_model.index_to_key)
+    ids_path, scores_path = get_table_paths(path)
+    table_ids = np.lib.format.open_memmap(
+        ids_path, mode="w+", dtype=np.int32, shape=(vocab_size, topn)
+    )
+    table_scores = np.lib.format.open_memmap(
+        scores_path, mode="w+", dtype=np.float32, shape=(vocab_size, topn)
+    )
+    chunk_size = simitool.get_neighbour_chunk_size(batch_memory)
+    for start in range(0, vocab_size, chunk_size):
+        end = min(start + chunk_size, vocab_size)
+        neighbour_ids, scores = simitool.get_neighbour_ids(
+            np.arange(start, end), topn
+        )
+        table_ids[start:end] = neighbour_ids
+        table_scores[start:end] = scores
+        simitool.cond_print(f"Neighbour table: {end}/{vocab_size}")
+    table_ids.flush()
+    table_scores.flush()
+    del table_ids, table_scores
+
+
+
+class NeighbourTable():
+
+    """ Read-only, memory-mapped neighbour table, see module docstring.
+        Used by ProcessSimilarity as a replacement for live
+        'most_similar' queries.
+    """
+
+    def __init__(self, path:str, w2v_model) -> None:
+        """ Loads the table at 'path' (prefix, see module docstring)
+            for 'w2v_model', which is needed to convert between words
+            and vocabulary indexes.
+            Exception: ValueError if the table does not match the
+                vocabulary size of the model.
+        """
+        ids_path, scores_path = get_table_paths(path)
+        self.ids = np.load(ids_path, mmap_mode="r")
+        self.scores = np.load(scores_path, mmap_mode="r")
+        if self.ids.shape != self.scores.shape or \
+                self.ids.shape[0] != len(w2v_model.index_to_key):
+            raise ValueError(f"Neighbour table '{path}' does not match the model.")
+        self.topn = self.ids.shape[1]
+        self.key_to_index = w2v_model.key_to_index
+        self.index_to_key = w2v_model.index_to_key
+
+
+    def get_most_similar(self, word:str, topn:int = 10) -> list:
+        """ Returns [(word, confidence_score), ...] with the 'topn' best
+            neighbours of 'word', or None if the word is not in the model.
+        """
+        index = self.key_to_index.get(word)
+        if index is None: return None
+        row_ids = self.ids[index, :topn].tolist()
+        row_scores = self.scores[index, :topn].tolist()
+        return [
+            (self.index_to_key[neighbour], score)
+            for neighbour, score in zip(row_ids, row_scores)
+            if neighbour >= 0
+        ]
@@ -1,11 +1,327 @@
+import os
+import time
+import atexit
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import gensim.downloader as api
+from gensim.models import KeyedVectors
 from packages.cleaning.data_object import DataObj
 from packages.cleaning.basic_cleaner import BasicCleaner
+from packages.similarity.neighbour_table import NeighbourTable
+from packages.similarity.siminet import SimiNet, SimiNetMatrix, to_siminet
+from packages.similarity.siminet import get_overlap_score
 
 # // Model Info:
 # //    https://raw.githubusercontent.com/RaRe-Technologies/gensim-data/master/list.json
 # //    https://radimrehurek.com/gensim/downloader.html
 
+_CACHE_MISS = object() # // Sentinel, None is a valid cached value.
+# // Words looked up between time_limit checks, see ProcessSimilarity.get_similarity_net.
+TIME_CHECK_WORDS = 64
+
+# // Bytes per (word, vocabulary row) in ProcessSimilarity.get_neighbour_ids:
+# // a float32 score and an int64 argpartition index.
+NEIGHBOUR_SCAN_BYTES = 12
+
+# // Local model store, see get_model_path & ProcessSimilarity.load_model.
+MODEL_DIR_ENV = "NOODLE_MODEL_DIR"
+DEFAULT_MODEL_DIR = "models"
+
+
+def get_model_path(name:str, model_dir:str = None) -> str:
+    """ Path of model 'name' in the local model store, in gensim's
+        native KeyedVectors format (vectors are in a '.vectors.npy'
+        file next to it). 'model_dir' defaults to the directory in
+        the MODEL_DIR_ENV env variable, else DEFAULT_MODEL_DIR.
+    """
+    if model_dir is None: model_dir = os.environ.get(MODEL_DIR_ENV, DEFAULT_MODEL_DIR)
+    return os.path.join(model_dir, f"{name}.kv")
+
+
+def get_normed_path(path:str) -> str:
+    """ Path of the unit-normed vectors (see save_normed_vectors)
+        of the model at 'path' (see get_model_path).
+    """
+    return f"{path}.normed.npy"
+
+
+def save_normed_vectors(model:KeyedVectors, path:str, chunk_rows:int = 65536) -> str:
+    """ Stores the vectors of 'model' with each row normalised to unit
+        length, next to the model at 'path' (see get_normed_path), such
+        that processes can memory-map them instead of each computing a
+        private copy (see ProcessSimilarity.get_normed_vectors). Written
+        in chunks of 'chunk_rows', so 'model' can be memory-mapped.
+        Returns the path of the normed vectors.
+    """
+    normed_path = get_normed_path(path)
+    temp_path = f"{normed_path}.{os.getpid()}.tmp.npy"
+    vectors = model.vectors
+    normed = np.lib.format.open_memmap(
+        temp_path, mode="w+", dtype=np.float32, shape=vectors.shape
+    )
+    for start in range(0, len(vectors), chunk_rows):
+        chunk = np.asarray(vectors[start:start + chunk_rows], dtype=np.float32)
+        norms = np.linalg.norm(chunk, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            normed[start:start + chunk_rows] = chunk / norms[:, np.newaxis]
+    normed.flush()
+    del normed
+    os.replace(temp_path, normed_path)
+    return normed_path
+
+
+def convert_model(name:str, model_dir:str = None) -> str:
+    """ Downloads (or reuses gensim-data's download of) model 'name'
+        and stores it in the local model store, see get_model_path.
+        Needs network access only if gensim-data does not have the
+        model already. Returns the path.
+    """
+    path = get_model_path(name=name, model_dir=model_dir)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    model = api.load(name)
+    # // Save under a temp name and rename, such that an interrupted
+    # // conversion never leaves a half written model at 'path'.
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    model.save(temp_path, separately=["vectors"])
+    os.replace(f"{temp_path}.vectors.npy", f"{path}.vectors.npy")
+    os.replace(temp_path, path)
+    save_normed_vectors(model, path)
+    return path
+
+
+def get_pruned_name(name:str, alpha_only:bool = False, max_vocab:int = None) -> str:
+    """ Name of the pruned variant of model 'name' in the local model
+        store (see prune_model); 'name' itself if there is no pruning.
+    """
+    if alpha_only: name = f"{name}.alpha"
+    if max_vocab: name = f"{name}.max{max_vocab}"
+    return name
+
+
+def prune_model(name:str,
+                alpha_only:bool = False,
+                max_vocab:int = None,
+                model_dir:str = None) -> str:
+    """ Stores a reduced copy of model 'name' in the local model store,
+        under get_pruned_name(...), and returns its path. The full model
+        is converted first if needed (see convert_model).
+            - alpha_only: Keep only words which siminets can contain,
+                see ProcessSimilarity.is_valid_word.
+            - max_vocab: Keep at most this many words, the first ones in
+                the model's order (most frequent first, for pre-made models).
+    """
+    full_path = get_model_path(name=name, model_dir=model_dir)
+    if not os.path.isfile(full_path): convert_model(name=name, model_dir=model_dir)
+    full = KeyedVectors.load(full_path, mmap="r")
+    indexes = range(len(full.index_to_key))
+    if alpha_only:
+        indexes = [
+            index for index in indexes
+            if ProcessSimilarity.is_valid_word(full.index_to_key[index])
+        ]
+    indexes = np.array(indexes[:max_vocab] if max_vocab else indexes, dtype=np.int64)
+    pruned = KeyedVectors(full.vector_size)
+    pruned.add_vectors([full.index_to_key[index] for index in indexes], full.vectors[indexes])
+
+    path = get_model_path(
+        name=get_pruned_name(name, alpha_only, max_vocab), model_dir=model_dir
+    )
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    pruned.save(temp_path, separately=["vectors"])
+    os.replace(f"{temp_path}.vectors.npy", f"{path}.vectors.npy")
+    os.replace(temp_path, path)
+    save_normed_vectors(pruned, path)
+    return path
+
+
+class NeighbourCache():
+
+    """ Bounded cache for word2vec neighbour lookups, used by
+        ProcessSimilarity such that frequent words (which is most
+        of them in a tweet stream) do not trigger a full scan over
+        the model vocabulary each time they are seen.
+
+        Entries are keyed by (word, topn). Values are the result of
+        'most_similar', or None if the word is not in the model
+        (such that misses for unknown words are cached as well).
+
+        Eviction policies:
+            - 'lru': least recently used entry is evicted.
+            - 'lfu': least frequently used entry is evicted, ties
+                are broken by least recent use.
+
+        NOTE: Entries only make sense for the model they were created
+            with, so persisted caches are tagged with the model name
+            and ignored on load if that name does not match.
+    """
+
+    def __init__(self,
+                 max_size:int = 20000,
+                 policy:str = "lru",
+                 path:str = None) -> None:
+        """ Init with:
+                - max_size: Max count of entries before eviction.
+                - policy: Eviction policy, 'lru' or 'lfu'. Anything
+                    else raises a ValueError.
+                - path: Optional file path used by save() and load()
+                    for persistence between runs.
+        """
+        if policy not in ["lru", "lfu"]:
+            raise ValueError(f"Cache policy '{policy}' not supported.")
+        if max_size < 1: raise ValueError("Expected minimum cache size of 1")
+        self.max_size = max_size
+        self.policy = policy
+        self.path = path
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict() # // key : value, in order of use.
+        # // For lfu only; {key : use_count} and {use_count : OrderedDict(keys)}
+        self.__key_frequency = {}
+        self.__frequency_keys = {}
+        self.__frequency_min = 0
+
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+    def __contains__(self, key) -> bool:
+        return key in self.__entries
+
+
+    def __set_frequency(self, key, frequency:int) -> None:
+        "Move a key to the use count bucket of 'frequency' (lfu bookkeeping)."
+        frequency_old = self.__key_frequency.get(key)
+        if frequency_old is not None:
+            bucket = self.__frequency_keys[frequency_old]
+            del bucket[key]
+            if not bucket: del self.__frequency_keys[frequency_old]
+        self.__key_frequency[key] = frequency
+        self.__frequency_keys.setdefault(frequency, OrderedDict())[key] = None
+        # // Keep track of the lowest use count, used by self.__evict.
+        if frequency_old is None:
+            if len(self.__key_frequency) == 1 or frequency < self.__frequency_min:
+                self.__frequency_min = frequency
+        elif self.__frequency_min not in self.__frequency_keys:
+            self.__frequency_min = min(self.__frequency_keys)
+
+
+    def __evict(self) -> None:
+        "Remove one entry according to self.policy."
+        if self.policy == "lru":
+            self.__entries.popitem(last=False)
+        else:
+            bucket = self.__frequency_keys[self.__frequency_min]
+            key, _ = bucket.popitem(last=False)
+            if not bucket: del self.__frequency_keys[self.__frequency_min]
+            del self.__key_frequency[key]
+            del self.__entries[key]
+        self.evictions += 1
+
+
+    def get(self, key, default=None):
+        """ Get cached value for 'key' and count a hit,
+            or return 'default' and count a miss.
+        """
+        with self.__lock:
+            if key not in self.__entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            if self.policy == "lfu":
+                self.__set_frequency(key, self.__key_frequency[key] + 1)
+            return self.__entries[key]
+
+
+    def put(self, key, value) -> None:
+        "Add or update an entry, evicting if self.max_size is exceeded."
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries[key] = value
+                self.__entries.move_to_end(key)
+                if self.policy == "lfu":
+                    self.__set_frequency(key, self.__key_frequency[key] + 1)
+                return
+            if len(self.__entries) >= self.max_size: self.__evict()
+            self.__entries[key] = value
+            if self.policy == "lfu": self.__set_frequency(key, 1)
+
+
+    def clear(self) -> None:
+        "Drops all entries and resets counters."
+        with self.__lock:
+            self.__entries.clear()
+            self.__key_frequency.clear()
+            self.__frequency_keys.clear()
+            self.__frequency_min = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+    def get_stats(self) -> dict:
+        "Returns size and hit/miss counters of this cache."
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.__entries),
+            "max_size": self.max_size,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+    def save(self, model_name:str, path:str = None) -> None:
+        """ Pickles entries (and lfu counts) to 'path', or self.path
+            if 'path' is not given. Tagged with 'model_name', see
+            class docstring. The file is replaced at once, so processes
+            sharing a path (worker processes) never see a partial one.
+        """
+        path = path or self.path
+        if not path: return
+        with self.__lock:
+            content = {
+                "model_name": model_name,
+                "entries": [
+                    [key, value, self.__key_frequency.get(key, 1)]
+                    for key, value in self.__entries.items()
+                ]
+            }
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, mode="wb") as file:
+            pickle.dump(content, file)
+        os.replace(temp_path, path)
+
+
+    def load(self, model_name:str, path:str = None) -> bool:
+        """ Loads entries from 'path' (or self.path) if the file exists
+            and was saved with the same 'model_name'. Entries are added
+            in their saved order of use. Returns True on load.
+        """
+        path = path or self.path
+        if not path or not os.path.isfile(path): return False
+        with open(path, mode="rb") as file:
+            content = pickle.load(file)
+        if content.get("model_name") != model_name: return False
+        for key, value, frequency in content["entries"]:
+            self.put(key, value)
+            # // Restore lfu counts, such that hot words are still hot.
+            if self.policy == "lfu" and key in self.__entries:
+                with self.__lock: self.__set_frequency(key, frequency)
+        return True
+
+
+
 class ProcessSimilarity():
         
     """ This class is responsible for handling similarities.
@@ -27,13 +343,54 @@ class ProcessSimilarity():
             This refers to packages.cleaning.data_object.
     """
 
-    def __init__(self, verbosity:bool = False) -> None:
-        "Initialisation with verbosity specification."
+    def __init__(self,
+                 verbosity:bool = False,
+                 cache_size:int = 20000,
+                 cache_policy:str = "lru",
+                 cache_path:str = None) -> None:
+        """ Initialisation with verbosity specification and neighbour
+            cache settings (see NeighbourCache in this module):
+                - cache_size: Max cached neighbour lookups, 0 disables
+                    the cache.
+                - cache_policy: 'lru' or 'lfu'.
+                - cache_path: If set, the cache is loaded from this
+                    file when a model is loaded, and saved to it on
+                    interpreter exit (or with self.save_cache()).
+        """
         self.verbosity = verbosity
 
         self.w2v_model = None
+        self.model_name = None
         self.verbosity = False
 
+        self.neighbour_table = None # // See self.load_neighbour_table().
+
+        # // L2 normalised copy of the model vectors, see self.get_normed_vectors().
+        self.__normed_vectors = None
+        self.__normed_model = None
+
+        self.neighbour_cache = None
+        if cache_size > 0:
+            self.neighbour_cache = NeighbourCache(
+                max_size=cache_size,
+                policy=cache_policy,
+                path=cache_path
+            )
+            if cache_path: atexit.register(self.save_cache)
+
+    @staticmethod
+    def is_valid_word(content:str) -> bool:
+        """ Whether a word can be part of a siminet (and is expanded further);
+            only alpha chars and a len of at least 2 (arbitrary len).
+        """
+        # // Signal bracn abort if there is a non-alpha.
+        for char in content: 
+            if not char.isalpha(): 
+                return False
+        # // Signal branch abort if len is insufficient (arbitrary len)
+        if len(content) < 2: return False 
+        return True
+
     def get_model_info(self, name:str="glove-twitter-25") -> None: # // for pre-made
         "Print some info about a model."
         api.info(name)
@@ -42,33 +399,262 @@ class ProcessSimilarity():
         "'Custom' print which prints only if self.verbosity is True."
         if self.verbosity: print(msg)
 
-    def load_model(self, name:str ="glove-twitter-25") -> None: # // pre-made
-        "Load a w2v model into this instance for further use (siminet creation)."
+    def load_model(self, 
+                   name:str = "glove-twitter-25",
+                   model_dir:str = None,
+                   mmap:bool = True,
+                   alpha_only:bool = False,
+                   max_vocab:int = None) -> None: # // pre-made
+        """ Load a w2v model into this instance for further use (siminet creation).
+            The model is read from the local model store (see get_model_path),
+            and converted into it on first use (see convert_model). With
+            'mmap', vectors are memory-mapped read-only, such that loading is
+            near instant and processes loading the same model share one
+            physical copy of the vectors (and of the unit-normed vectors,
+            see save_normed_vectors; created here for older stores).
+
+            With 'alpha_only' and/or 'max_vocab', a pruned model is used
+            instead (see prune_model; created on first use). Neighbour
+            search then scans fewer rows, and the top matches of a word
+            are all valid siminet words, so siminets can differ from the
+            ones of the full model. self.model_name gets the pruned name.
+        """
         self.cond_print("Loading model...")
-        self.w2v_model = api.load("glove-twitter-25")
+        pruned_name = get_pruned_name(name, alpha_only, max_vocab)
+        path = get_model_path(name=pruned_name, model_dir=model_dir)
+        if not os.path.isfile(path):
+            if pruned_name == name:
+                self.cond_print(f"Converting model '{name}' to '{path}'...")
+                convert_model(name=name, model_dir=model_dir)
+            else:
+                self.cond_print(f"Pruning model '{name}' to '{path}'...")
+                prune_model(
+                    name=name,
+                    alpha_only=alpha_only,
+                    max_vocab=max_vocab,
+                    model_dir=model_dir
+                )
+        self.w2v_model = KeyedVectors.load(path, mmap="r" if mmap else None)
+        if mmap:
+            normed_path = get_normed_path(path)
+            if not os.path.isfile(normed_path):
+                save_normed_vectors(self.w2v_model, path)
+            self.__normed_vectors = np.load(normed_path, mmap_mode="r")
+            self.__normed_model = self.w2v_model
+        self.model_name = pruned_name
+        self.neighbour_table = None # // Built for the previous model, if any.
         self.cond_print("Done loading model.")
+        # // Cached neighbours belong to the previous model, if any.
+        if self.neighbour_cache is not None:
+            self.neighbour_cache.clear()
+            if self.neighbour_cache.load(model_name=self.model_name):
+                self.cond_print(f"Loaded {len(self.neighbour_cache)} cached neighbours.")
+
+
+    def load_neighbour_table(self, path:str) -> None:
+        """ Use a precomputed neighbour table (see
+            packages.similarity.neighbour_table) instead of live model
+            queries, for all lookups with a topn up to the table width.
+            Requires a loaded model, which the table must be built from.
+        """
+        if self.w2v_model is None: raise ValueError("Load a model before the table")
+        self.neighbour_table = NeighbourTable(path=path, w2v_model=self.w2v_model)
+        self.cond_print(f"Loaded neighbour table '{path}'.")
+
+
+    def save_cache(self) -> None:
+        "Persist the neighbour cache, if it is enabled and has a path."
+        if self.neighbour_cache is None or self.model_name is None: return
+        self.neighbour_cache.save(model_name=self.model_name)
+
+
+    def get_most_similar(self, word:str, topn:int = 10) -> list:
+        """ Stand-in for 'self.w2v_model.most_similar(word, topn=topn)'
+            which goes through the neighbour cache first, if enabled.
+            Returns a list of [(word, confidence_score), ...].
+            Exception: KeyError if 'word' is not in the model, just
+            like the w2v model itself.
+        """
+        if self.neighbour_table is not None and topn <= self.neighbour_table.topn:
+            result = self.neighbour_table.get_most_similar(word, topn)
+            if result is None: raise KeyError(f"Key '{word}' not present")
+            return result
+        if self.neighbour_cache is None:
+            return self.w2v_model.most_similar(word, topn=topn)
+        key = (word, topn)
+        result = self.neighbour_cache.get(key, _CACHE_MISS)
+        if result is _CACHE_MISS:
+            try:
+                result = tuple(self.w2v_model.most_similar(word, topn=topn))
+            except KeyError:
+                result = None
+            self.neighbour_cache.put(key, result)
+        if result is None: raise KeyError(f"Key '{word}' not present")
+        return list(result)
+
+
+    def get_normed_vectors(self) -> np.ndarray:
+        """ Returns the embedding matrix of self.w2v_model with each
+            row normalised to unit length. Models loaded with mmap (see
+            self.load_model) use the memory-mapped copy from the model
+            store, shared by all processes; other models get a private
+            copy, computed once per model. Used by
+            self.get_most_similar_batch().
+        """
+        if self.__normed_model is not self.w2v_model:
+            self.w2v_model.fill_norms()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.__normed_vectors = (
+                    self.w2v_model.vectors / self.w2v_model.norms[:, np.newaxis]
+                )
+            self.__normed_model = self.w2v_model
+        return self.__normed_vectors
+
+
+    def get_neighbour_ids(self, ids:np.ndarray, topn:int = 10) -> list:
+        """ Scores model rows 'ids' against the normalised embedding
+            matrix with one matrix-matrix product and picks the top 'topn'
+            of each row with argpartition. The word itself is excluded,
+            just like with 'most_similar'.
+
+            Returns a list: [neighbour_ids, scores], both with the shape
+            (len(ids), topn), sorted by descending score. If the model
+            has less than 'topn' other words, rows are padded with
+            id -1 and score 0.
+            NOTE: Memory use is len(ids) * vocabulary size *
+                NEIGHBOUR_SCAN_BYTES, so large 'ids' arrays should be
+                chunked by the caller (see self.get_neighbour_chunk_size).
+        """
+        normed = self.get_normed_vectors()
+        vocab_size = normed.shape[0]
+        # // +1 because the word itself is always its own best match.
+        candidate_count = min(topn + 1, vocab_size)
+        scores = np.dot(normed[ids], normed.T) # // (len(ids), vocab_size)
+        if candidate_count < vocab_size:
+            # // Top of the scores themselves (no negated copy): last columns.
+            kth = vocab_size - candidate_count
+            best = np.argpartition(scores, kth, axis=1)[:, kth:]
+        else:
+            best = np.tile(np.arange(vocab_size), (len(ids), 1))
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        # // Move the word itself to the end of its row (stable), then cut it off.
+        order = np.argsort(best == ids[:, np.newaxis], axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)[:, :candidate_count - 1]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        if best.shape[1] < topn: # // Tiny model, pad.
+            padding = topn - best.shape[1]
+            best = np.pad(best, ((0, 0), (0, padding)), constant_values=-1)
+            best_scores = np.pad(best_scores, ((0, 0), (0, padding)))
+        return [best, best_scores]
+
+
+    def get_neighbour_chunk_size(self, batch_memory:int) -> int:
+        """ Max rows per self.get_neighbour_ids call such that it
+            uses at most 'batch_memory' bytes (at least one row).
+        """
+        vocab_size = len(self.w2v_model.index_to_key)
+        return max(1, batch_memory // (vocab_size * NEIGHBOUR_SCAN_BYTES))
+
+
+    def get_most_similar_batch(self,
+                               words:list,
+                               topn:int = 10,
+                               batch_memory:int = 64 * 1024 ** 2) -> list:
+        """ Batched version of self.get_most_similar(), which scores
+            chunks of words with self.get_neighbour_ids() instead of doing
+            one full scan per word.
+
+            Returns a list aligned with 'words', where each item is either
+            [(word, confidence_score), ...] or None if the word is not in
+            the model. Neighbours and their order are the same as with
+            'most_similar'; scores may differ in the last float32 digit.
+
+            'batch_memory' caps the memory (bytes) of each chunk, see
+            self.get_neighbour_chunk_size.
+        """
+        if self.neighbour_table is not None and topn <= self.neighbour_table.topn:
+            return [self.neighbour_table.get_most_similar(word, topn) for word in words]
+
+        results = [None] * len(words)
+        positions = {} # // {word : [indexes in 'words']} for words to compute.
+        for i, word in enumerate(words):
+            if self.neighbour_cache is not None:
+                cached = self.neighbour_cache.get((word, topn), _CACHE_MISS)
+                if cached is not _CACHE_MISS:
+                    if cached is not None: results[i] = list(cached)
+                    continue
+            positions.setdefault(word, []).append(i)
+        if not positions: return results
+
+        key_to_index = self.w2v_model.key_to_index
+        index_to_key = self.w2v_model.index_to_key
+        chunk_size = self.get_neighbour_chunk_size(batch_memory)
+
+        found = [word for word in positions if word in key_to_index]
+        for word in positions:
+            if word not in key_to_index and self.neighbour_cache is not None:
+                self.neighbour_cache.put((word, topn), None)
+
+        for start in range(0, len(found), chunk_size):
+            chunk = found[start:start + chunk_size]
+            ids = np.array([key_to_index[word] for word in chunk])
+            neighbour_ids, scores = self.get_neighbour_ids(ids, topn)
+            for row, word in enumerate(chunk):
+                sim_lst = [
+                    (index_to_key[index], float(score))
+                    for index, score in zip(neighbour_ids[row], scores[row])
+                    if index >= 0
+                ]
+                if self.neighbour_cache is not None:
+                    self.neighbour_cache.put((word, topn), tuple(sim_lst))
+                for i in positions[word]: results[i] = list(sim_lst)
+        return results
 
 
     def get_similarity_net(self, 
                            query:list, 
-                           max_recursion:int = 2) -> list:
-        """ Wrapper for similarity net creator, containing the creator and some  
-            necessary safety checks and additional operations, mainly siminet compression.
-
-            The siminet creator itself (called 'calculate') goes through each query
-            word in a list and gets similar words, which are passed into the function
-            again recursively. For each branch, the query is added to a collection, 
-            along with where it came from (what word was used to get it through the model),
-            recursion level, and confidence level. The format is:
-                [[recursion_lvl, query, match, confidence_score], ... ]
-            The recursion/branching is limited by the 'max_recursion' param.
+                           max_recursion:int = 2,
+                           max_nodes:int = None,
+                           beam_width:int = None,
+                           min_similarity:float = None,
+                           time_limit:float = None) -> list:
+        """ Creates a compressed similarity net (siminet) for a list of words,
+            in this format:
+                [[word, confidence_score], ...]
+
+            The net is built breadth-first, one recursion level at a time.
+            Level 0 is the 'query' itself. Each word on a level is queried
+            against the w2v model, and each valid match (see self.is_valid_word)
+            goes to the next level and gets its confidence score divided
+            by (level + 1) added to its total in the siminet. The
+            branching is limited by the 'max_recursion' param.
             NOTE max_recursion < 1 is prohibited and will raise a ValueError.
 
-            This similarity net created by 'calculate' will get automatically
-            compressed to remove back- and cross-referencing (words appearing
-            more than once in the siminet). This will create a new format:
-                [[word, confidence_score], ...]
-            This is forced but can be manually disabled at the return line.
+            A word that is reached through more than one path on a level
+            counts once per path (as it would in a tree of all branches),
+            but it is queried and expanded only once; the level keeps a
+            path count per word instead. Neighbours of a whole level are
+            fetched with one batched lookup (self.get_most_similar_batch).
+            The result has the same words and scores as the tree format
+            compressed with self.compress_similarity_net, but without
+            building the tree (10^max_recursion entries per word).
+
+            Optional budget, to cap the work done per call (None = no cap):
+                - max_nodes: Max count of words in the siminet. New matches
+                    are dropped when it is full, and no more levels are
+                    expanded.
+                - beam_width: Max count of words expanded per level; the
+                    ones with the highest score gained on the current
+                    level are kept. Other matches stay in the siminet.
+                - min_similarity: Matches with a lower confidence score
+                    are dropped (and not expanded).
+                - time_limit: Seconds. When exceeded, the siminet built so
+                    far is returned. Checked before each level, and within
+                    a level after every TIME_CHECK_WORDS lookups; words of
+                    the level which were not looked up by then are not
+                    expanded.
         """
         # // Do setup check and value check.
         if self.w2v_model is None:
@@ -77,110 +663,154 @@ class ProcessSimilarity():
         if max_recursion < 1: raise ValueError("Expected minimum recursion of 1")
         self.cond_print(f"Starting similarity fetch for: {query}.")
         
-        def validate_next(content:str) -> bool:
-            " Validate a word before more recursion (performance boost)."
-            # // Signal bracn abort if there is a non-alpha.
-            for char in content: 
-                if not char.isalpha(): 
-                    return False
-            # // Signal branch abort if len is insufficient (arbitrary len)
-            if len(content) < 2: return False 
-            return True
-
-        def calculate(query:list, current_recursion:int, max_recursion:int) -> list:
-            "Create similarity net, see wrapper docstring for more information"
-            if current_recursion >= max_recursion: return [] # // Exit clause.
-            current_degree = []
-            for word in query:
-                try: # // Try because some wors may not be in the w2v model.
-                    sim_lst = self.w2v_model.most_similar(word) # // Query w2v.
-                    for item in sim_lst:
-                        next_query = [item[0]] # // next query, chunked. 
-                         # // Drop non-alpha and with insufficient len
-                        if validate_next(item[0]):
-                            # // Save to collection.
-                            current_degree.append(
-                                [current_recursion, word, item[0],item[1]]
-                            )
-                            # // Create new branch(recursion)
-                            result = calculate(
-                                next_query, 
-                                current_recursion + 1, 
-                                max_recursion
-                            )
-                            # // Save if any.
-                            if result: current_degree.extend(result)
-                except KeyError:
-                    pass 
-            return current_degree # // Give back branch.
-
-        # // Get siminet, compress it and return.
-        result = calculate(query, 0, max_recursion)
+        deadline = None
+        if time_limit is not None: deadline = time.perf_counter() + time_limit
+        siminet = {}    # // {word : cumulated confidence_score}
+        neighbours = {} # // {word : [(match, confidence_score), ...] or None}
+        frontier = {}   # // {word : path count} for the current level.
+        for word in query: frontier[word] = frontier.get(word, 0) + 1
+
+        for level in range(max_recursion):
+            if deadline is not None and time.perf_counter() > deadline:
+                self.cond_print(f"Time limit reached on level {level}.")
+                break
+            # // Batched w2v queries for words not seen on earlier levels;
+            # // with a deadline, in chunks such that it is checked in between.
+            unseen = [word for word in frontier if word not in neighbours]
+            chunk_size = len(unseen) if deadline is None else TIME_CHECK_WORDS
+            timed_out = False
+            for start in range(0, len(unseen), max(chunk_size, 1)):
+                if start and time.perf_counter() > deadline:
+                    self.cond_print(f"Time limit reached within level {level}.")
+                    timed_out = True
+                    break
+                chunk = unseen[start:start + chunk_size]
+                neighbours.update(zip(chunk, self.get_most_similar_batch(chunk)))
+            next_frontier = {}
+            level_scores = {} # // Score gained per match on this level (beam).
+            for word, path_count in frontier.items():
+                # // None if not in the w2v model, or not looked up in time.
+                sim_lst = neighbours.get(word)
+                if sim_lst is None: continue
+                for match, confidence in sim_lst:
+                    # // Drop non-alpha and with insufficient len
+                    if not self.is_valid_word(match): continue
+                    if min_similarity is not None and confidence < min_similarity:
+                        continue
+                    if max_nodes is not None and match not in siminet \
+                            and len(siminet) >= max_nodes:
+                        continue
+                    # // Divide simi score by recursion depth. + 1 because ..
+                    # // .. recursion depth starts at 0.
+                    score = path_count * (confidence / (level + 1))
+                    siminet[match] = siminet.get(match, 0) + score
+                    next_frontier[match] = next_frontier.get(match, 0) + path_count
+                    if beam_width is not None:
+                        level_scores[match] = level_scores.get(match, 0) + score
+            if beam_width is not None and len(next_frontier) > beam_width:
+                beam = sorted(level_scores, key=level_scores.get, reverse=True)
+                next_frontier = {word : next_frontier[word] for word in beam[:beam_width]}
+            frontier = next_frontier
+            if not frontier or timed_out: break
+            if max_nodes is not None and len(siminet) >= max_nodes: break
+
         self.cond_print(f"Ended similarity fetch for: {query}.") 
-        return self.compress_similarity_net(result)
+        return [[word, score] for word, score in siminet.items()]
 
 
     def compress_similarity_net(self, lst:list) -> list:
-        """ Takes this format of a standard siminet(created by 
-            calculate() in self.get_similarity_net()):
+        """ Takes this format of an uncompressed siminet (tree of all branches):
                 [[recursion_lvl, query, match, confidence_score], ...]
             and creates a new one without any duplicates, recursion levels, 
             or 'came-from' values, which are noted as 'query' in the example above.
             Returns the compressed siminet in this form:
                 [[word, confidence_score], ...]
+            Scores are divided by (recursion_lvl + 1) and cumulated for
+            words which appear more than once. Words are ordered by their
+            last occurrence in 'lst', last first.
+            NOTE: self.get_similarity_net creates the compressed form
+                directly, this is kept for tree formatted siminets.
         """
-        lst = lst.copy()    # // Redundancy.
+        # // Depth-weighted scores by word, in list order. Divide simi score ..
+        # // .. by recursion depth. + 1 because recursion depth starts at 0.
+        weighted = {}
+        for item in lst:
+            weighted.setdefault(item[2], []).append(item[3] / (item[0] + 1))
+
         new_lst = []        # // Collection for end result.
-        for i in range(len(lst)):
-            current_item = lst.pop()
-            current_word = current_item[2] # // Accessing new word.
-
-            # Skip duplicates and re-calculations.
-            previous_words = [item[0] for item in new_lst]
-            if current_word in previous_words: continue
-            
-            # // Divide simi score by recursion depth. + 1 because ..
-            # // .. recursion depth starts at 0.
-            calc_score = lambda score, depth: score / (depth + 1)
-            
-            # // Score of current word.
-            current_score = calc_score(
-                score = current_item[3],
-                depth = current_item[0]
-            )
-            # // Check current against all others in siminet to ..
-            # // .. cumulate score on duplicates. Only one occurence ..
-            # // .. of a word will remain.
-            for other_item in lst:
-                other_word = other_item[2]
-                if current_word == other_word:
-                    # // Add to current score if word appears more  ..
-                    # // .. than once in the original list.
-                    current_score += calc_score(
-                        score= other_item[3],
-                        depth=other_item[0]
-                    )
-            # // Save.
+        for item in reversed(lst):
+            current_word = item[2]
+            scores = weighted.pop(current_word, None)
+            if scores is None: continue # // Skip duplicates.
+            # // Start with the last occurrence, then cumulate the others.
+            current_score = scores[-1]
+            for score in scores[:-1]: current_score += score
             new_lst.append([current_word, current_score])
         return new_lst
 
 
     def get_score_compressed_siminet(self, new:list, other:list) -> float:
-        " Takes two compressed siminets and compares them to get a score. "
+        """ Takes two compressed siminets and compares them to get a score.
+            Identical words increment the score symmetrically (both
+            confidence scores are added).
+
+            Siminets can be lists or SimiNet (packages.similarity.siminet).
+            Two SimiNets are scored with a sorted merge of their word ids,
+            anything else with a hash join on words. Both give the same
+            result as comparing every word of 'new' against every word
+            of 'other', in O(n + m) instead of O(n * m).
+        """
+        if isinstance(new, SimiNet) and isinstance(other, SimiNet):
+            return get_overlap_score(new, other)
+
+        # // Index 'other' by word (list format may repeat a word).
+        other_scores = {}
+        for item_other in other:
+            other_scores.setdefault(item_other[0], []).append(item_other[1])
+
         total_score = 0
         for item_new in new:
-            for item_other in other:
-                # // Unpacking for clarity.
-                word_a = item_new[0]
-                score_a = item_new[1]
-                word_b = item_other[0]
-                score_b = item_other[1]
-                # // Identical words will increment total_score symmetrically.
-                if word_a == word_b: total_score += (score_a + score_b)
-                    
+            # // Unpacking for clarity.
+            word_a = item_new[0]
+            score_a = item_new[1]
+            for score_b in other_scores.get(word_a, ()):
+                total_score += (score_a + score_b)
         return total_score
 
 
+    def get_top_simi_scores(self,
+                            new_object:DataObj,
+                            other_objects:list) -> list:
+        """ Takes a DataObj and scores its siminet against the siminets of
+            all DataObj in a list at once (see SimiNetMatrix in
+            packages.similarity.siminet). Returns a list:
+                [index, scores]
+            where 'index' points to the best match in 'other_objects' (or
+            is None if there is no match at all), and 'scores' is a float
+            array with one score per object in 'other_objects'.
+            Exceptions: ValueError if any of the dataobjects lack a siminet
+        """
+        # // Check if siminet exists.
+        error_suffix = "does not have a simi-net."
+        if new_object.siminet is None: raise ValueError(f"'new_object' {error_suffix}")
+        for other in other_objects: 
+            if other.siminet is None: 
+                raise ValueError(f"'other' {error_suffix}")
+
+        matrix = SimiNetMatrix([other.siminet for other in other_objects])
+        scores = matrix.get_scores(to_siminet(new_object.siminet))
+        if self.verbosity:
+            for other, score in zip(other_objects, scores):
+                self.cond_print(f"'{new_object.text}' + '{other.text}' = {score}")
+
+        # // Get top index; first highest, and only if above 0.
+        index = None
+        if len(scores):
+            top = int(np.argmax(scores))
+            if scores[top] > 0: index = top
+        return [index, scores]
+
+
     def get_top_simi_index(self, 
                            new_object:DataObj, 
                            other_objects:list) -> int: # // OR None.
@@ -189,29 +819,12 @@ class ProcessSimilarity():
             pointing to the best match.
             NOTE: Can return None if there is no match at all.
             Exceptions: ValueError if any of the dataobjects lack a siminet
+            See self.get_top_simi_scores, which this wraps.
         """
-        # // Check if siminet exists.
-        error_suffix = "does not have a simi-net."
-        if new_object.siminet == None: raise ValueError(f"'new_object' {error_suffix}")
-        for other in other_objects: 
-            if other.siminet == None: 
-                raise ValueError(f"'other' {error_suffix}")
-
-        # // Get top index.
-        score_highest = 0 
-        index = None
-        for i, other in enumerate(other_objects):
-            # // Get similarity score
-            score_current = self.get_score_compressed_siminet(
-                    new=new_object.siminet,
-                    other=other.siminet
-            )
-            self.cond_print(f"'{new_object.text}' + '{other.text}' = {score_current}")
-            # // Update highest if necessary.
-            if score_current > score_highest:
-                score_highest = score_current
-                index = i
-        return index
+        return self.get_top_simi_scores(
+            new_object=new_object,
+            other_objects=other_objects
+        )[0]
 
 
     def get_representatives(self, objects:list) -> list:
@@ -239,51 +852,30 @@ class ProcessSimilarity():
         )
 
 
-        def sorting_helper(score_dict: dict):
-            "Return key with highest integer value in a dict."
-            highscore = 0
-            highscore_key = None
-            keys = list(score_dict.keys())
-            for key in keys:
-                key_value = score_dict.get(key)
-                if key_value > highscore:
-                    highscore = key_value
-                    highscore_key = key
-            return highscore_key
-
         objects = objects.copy()
         sorted_objects = []
         if len(objects) > 2: # // Sort only if there are enough DataObjects.
-            # // Get incedes of representatives in objects:[DataObj]. 
-            # // Each mention of N adds N to mentions_by_index.
-            mentions_by_index = []
-            for obj in objects:
-                other_list = [other for other in objects # // Make a list without current obj.
-                                 if other.unique_id != obj.unique_id]
-                target = self.get_top_simi_index(new_object=obj, other_objects=other_list)
-                mentions_by_index.append(target)
-            # // Create dict structure where {obj_index : total_mentions}
-            score_dict = {index : 0 for index in range(len(objects))}
-            # // Distribute mentions from (mentions_by_index) into
-            # // the dictionary, which keys represent objects(by index).
-            for dict_index in range(len(objects)):
-                for mentions_index in mentions_by_index:
-                    if mentions_index == dict_index:
-                        score_dict[dict_index] += 1
-            # // Unpack dict data into sorted_objects for end result.
-            for _ in range(len(objects)):
-                top_index = sorting_helper(score_dict)
-                if top_index != None:
-                    sorted_objects.append(objects[top_index])
-                    del score_dict[top_index] # // Clear key with top score.
-                else: 
-                    # // No highscore is found, meaning that remaining scores
-                    # // are all 0. Now remaining indeces can be added at the 
-                    # // end of the sorted list.
-                    remaining_indeces = list(score_dict.keys())
-                    for i in remaining_indeces:
-                        sorted_objects.append(objects[i])
-                    break
+            # // Symmetric score matrix of all pairs, computed once.
+            matrix = SimiNetMatrix([obj.siminet for obj in objects])
+            scores = matrix.get_pairwise_scores()
+            # // An object is never compared with itself (or with another
+            # // object sharing its unique_id).
+            first_by_uid = {}
+            uid_codes = np.array([
+                first_by_uid.setdefault(obj.unique_id, index)
+                for index, obj in enumerate(objects)
+            ])
+            same_uid = uid_codes[:, None] == uid_codes[None, :]
+            scores[same_uid] = -np.inf
+            # // Each object mentions its best match (first highest, and
+            # // only if above 0), which counts for that match.
+            rows = np.arange(len(objects))
+            targets = np.argmax(scores, axis=1)
+            has_target = scores[rows, targets] > 0
+            mentions = np.bincount(targets[has_target], minlength=len(objects))
+            # // Most mentioned first; ties (including 0) keep list order.
+            for index in np.argsort(-mentions, kind="stable"):
+                sorted_objects.append(objects[index])
 
         else: # // Not possible to sort in a meaningful way, return as is.
             return [False, objects]
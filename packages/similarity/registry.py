@@ -0,0 +1,75 @@
+import threading
+
+from packages.similarity.process_tools import ProcessSimilarity, get_pruned_name
+
+""" This module contains a process-wide registry of simitools
+    (packages.similarity.process_tools.ProcessSimilarity), keyed by
+    model name.
+
+    Pipes and db tools get their simitool with get_simitool() instead
+    of creating their own, such that each w2v model is loaded at most
+    once per process and all users share that one copy (and its
+    neighbour cache). Only the first caller pays for the model load;
+    concurrent callers of the same name wait for that load instead of
+    starting another one.
+
+    NOTE: Settings of a simitool (verbosity, cache) are set by the
+        call that creates it. Later calls get the same instance.
+"""
+
+DEFAULT_MODEL = "glove-twitter-25"
+
+_lock = threading.Lock()
+_entries = {} # // {(pruned) model_name : [ProcessSimilarity, threading.Lock]}
+
+
+def get_simitool(name:str = DEFAULT_MODEL,
+                 load_model:bool = True,
+                 alpha_only:bool = False,
+                 max_vocab:int = None,
+                 **simitool_kwargs) -> ProcessSimilarity:
+    """ Returns the shared simitool for model 'name', creating it
+        (with 'simitool_kwargs', see ProcessSimilarity.__init__) if
+        this process has none yet. With 'load_model', the model is
+        loaded into it if that has not happened yet; without, the
+        simitool can be used for siminet scoring only (until any
+        caller asks for the model).
+        'alpha_only' and 'max_vocab' select a pruned model (see
+        ProcessSimilarity.load_model), which is shared separately.
+        NOTE: Simitools are keyed by name, alpha_only and max_vocab
+            only; for a given key, the first creator's
+            'simitool_kwargs' win, later ones are ignored. Users of
+            one model in a pipeline (SimiPipe, PyJSBridgePipe) must
+            pass the same 'alpha_only' and 'max_vocab', else each
+            gets (and loads) its own model.
+    """
+    key = get_pruned_name(name, alpha_only, max_vocab)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = [ProcessSimilarity(**simitool_kwargs), threading.Lock()]
+            _entries[key] = entry
+    simitool, load_lock = entry
+    if load_model and simitool.w2v_model is None:
+        with load_lock:
+            # // Checked again, another thread might have loaded it.
+            if simitool.w2v_model is None: 
+                simitool.load_model(name=name, alpha_only=alpha_only, max_vocab=max_vocab)
+    return simitool
+
+
+def get_loaded_names() -> list:
+    "Returns the names of models which are loaded in this process."
+    with _lock:
+        return [
+            name for name, entry in _entries.items()
+            if entry[0].w2v_model is not None
+        ]
+
+
+def clear() -> None:
+    """ Forgets all simitools. Instances already handed out keep
+        working, but later calls of get_simitool create new ones.
+    """
+    with _lock:
+        _entries.clear()
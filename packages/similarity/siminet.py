@@ -0,0 +1,296 @@
+import threading
+import numpy as np
+from scipy import sparse
+
+""" This module contains a compact representation of compressed
+    similarity nets (siminets, see packages.similarity.process_tools).
+
+    The list format of a siminet is:
+        [[word, confidence_score], ...]
+    which costs one list, one str reference and one float object per
+    word. SimiNet stores the same data as two typed arrays instead:
+        - ids: sorted int32 word ids, from the process-wide VocabInterner
+            in this module ('vocab').
+        - scores: float64 confidence scores, aligned with ids.
+    float64 is used (not float32) such that conversion to and from
+    the list format is lossless.
+
+    NOTE: Word ids are only valid in the process that created them,
+        so SimiNet instances are pickled in the list format.
+"""
+
+# // Default cap of VocabInterner; about 3x the glove-twitter vocabulary.
+VOCAB_MAX_SIZE = 4000000
+# // Id of words which could not be interned, see VocabInterner.intern_many.
+UNKNOWN_ID = -1
+
+
+class VocabInterner():
+
+    """ Process-wide mapping between words and int ids, used
+        by SimiNet. Ids are handed out in order of first use and
+        are never removed, as live SimiNets refer to them.
+        Thread-safe.
+
+        Growth: siminets only hold words of the w2v model (see
+        ProcessSimilarity.get_similarity_net), so the interner
+        stops growing at the vocabulary of the models in use.
+        As a guard against other sources of words (such as
+        siminets from a db made with another model), at most
+        'max_size' words are interned. Past that, new words get
+        no id (a warning is printed once) and siminets leave them
+        out (see SimiNet.from_list), so scoring degrades instead of
+        failing: shared words which are new are not counted. Words
+        already interned keep working.
+    """
+
+    def __init__(self, max_size:int = VOCAB_MAX_SIZE) -> None:
+        " Init with 'max_size' (see class docstring); None for no cap. "
+        self.__lock = threading.Lock()
+        self.__ids = {}     # // {word : id}
+        self.__words = []   # // Index is id.
+        self.max_size = max_size
+        self.full_reported = False # // Whether the full warning was printed.
+
+
+    def __len__(self) -> int:
+        return len(self.__words)
+
+
+    def intern(self, word:str) -> int:
+        """ Returns the id of 'word', creating one if it is new.
+            Returns None if it is new and the vocab is full (see
+            class docstring).
+        """
+        word_id = self.__ids.get(word)
+        if word_id is not None: return word_id
+        with self.__lock:
+            word_id = self.__ids.get(word)
+            if word_id is None:
+                word_id = len(self.__words)
+                if self.max_size is not None and word_id >= self.max_size:
+                    if not self.full_reported:
+                        self.full_reported = True
+                        print(f"warn: vocab is full ({self.max_size} words), "
+                                "new siminet words are left out.")
+                    return None
+                self.__words.append(word)
+                self.__ids[word] = word_id
+            return word_id
+
+
+    def intern_many(self, words:list) -> np.ndarray:
+        """ Returns an int32 array with the ids of 'words', see
+            self.intern; UNKNOWN_ID for words which got no id.
+        """
+        get_id = self.__ids.get
+        ids = [get_id(word) for word in words]
+        for i, word_id in enumerate(ids):
+            if word_id is None:
+                word_id = self.intern(words[i])
+                ids[i] = UNKNOWN_ID if word_id is None else word_id
+        return np.array(ids, dtype=np.int32)
+
+
+    def get_id(self, word:str) -> int:
+        "Returns the id of 'word', or None if it has not been interned."
+        return self.__ids.get(word)
+
+
+    def get_word(self, word_id:int) -> str:
+        "Returns the word for an id."
+        return self.__words[word_id]
+
+
+    def get_words(self, ids) -> list:
+        "Returns a list of words for an iterable of ids."
+        words = self.__words
+        return [words[word_id] for word_id in ids]
+
+
+# // Process-wide interner, used by all siminets.
+vocab = VocabInterner()
+
+
+
+class SimiNet():
+
+    """ Compact siminet, see module docstring. Iterating a SimiNet
+        gives (word, confidence_score) rows, in id order, such that
+        it can be used in place of the list format by code which
+        only reads rows (row[0] / row[1]).
+    """
+
+    __slots__ = ("ids", "scores")
+
+    def __init__(self, ids:np.ndarray = None, scores:np.ndarray = None) -> None:
+        """ Init with 'ids' (int32, sorted by value) and 'scores'
+            (aligned with 'ids'). Empty if not set. Use
+            SimiNet.from_list to convert from the list format.
+        """
+        if ids is None: ids = np.empty(0, dtype=np.int32)
+        if scores is None: scores = np.empty(0, dtype=np.float64)
+        if len(ids) != len(scores):
+            raise ValueError("Expected one score per id in siminet.")
+        self.ids = ids
+        self.scores = scores
+
+
+    @classmethod
+    def from_list(cls, siminet:list): # -> SimiNet
+        """ Converts the list format [[word, confidence_score], ...].
+            NOTE: Words are unique in a SimiNet. Compressed siminets never
+                repeat a word, but if 'siminet' does, scores are summed.
+                Words without an id (full vocab, see VocabInterner)
+                are left out.
+        """
+        ids = vocab.intern_many([row[0] for row in siminet])
+        scores = np.array([row[1] for row in siminet], dtype=np.float64)
+        if len(ids) and ids.min() == UNKNOWN_ID:
+            known = ids != UNKNOWN_ID
+            ids = ids[known]
+            scores = scores[known]
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        scores = scores[order]
+        if len(ids) > 1 and not np.all(ids[1:] != ids[:-1]):
+            ids, first = np.unique(ids, return_index=True)
+            scores = np.add.reduceat(scores, first)
+        return cls(ids=ids, scores=scores)
+
+
+    def to_list(self) -> list:
+        "Converts back to the list format [[word, confidence_score], ...]."
+        return [
+            [word, score] for word, score
+            in zip(vocab.get_words(self.ids.tolist()), self.scores.tolist())
+        ]
+
+
+    @property
+    def words(self) -> list:
+        "Words of this siminet, in id order."
+        return vocab.get_words(self.ids.tolist())
+
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+    def __iter__(self):
+        return zip(self.words, self.scores.tolist())
+
+
+    def __repr__(self) -> str:
+        return f"SimiNet({self.to_list()})"
+
+
+    def __reduce__(self):
+        # // Word ids are process specific, so pickle words instead.
+        return (SimiNet.from_list, (self.to_list(),))
+
+
+
+def get_overlap_score(new:SimiNet, other:SimiNet) -> float:
+    """ Symmetric overlap score of two siminets: for each word they
+        have in common, both confidence scores are added to the total.
+        Words are matched with a sorted merge of the id arrays, and the
+        total is summed in id order, one word at a time, which gives the
+        same result as comparing the rows of 'new' and 'other' pairwise.
+        Returns 0 if no words are shared.
+    """
+    if not len(new.ids) or not len(other.ids): return 0
+    # // Position of each id of 'new' in 'other' (both sorted).
+    positions = np.searchsorted(other.ids, new.ids)
+    positions[positions == len(other.ids)] = 0
+    matched = other.ids[positions] == new.ids
+    if not matched.any(): return 0
+    pair_scores = new.scores[matched] + other.scores[positions[matched]]
+    # // Sequential (not pairwise) summation, see docstring.
+    return float(np.cumsum(pair_scores)[-1])
+
+
+
+def to_siminet(siminet) -> SimiNet:
+    "Returns 'siminet' as a SimiNet, converting from the list format if needed."
+    if isinstance(siminet, SimiNet): return siminet
+    return SimiNet.from_list(siminet)
+
+
+
+class SimiNetMatrix():
+
+    """ Stack of siminets in a sparse row layout (CSR), such that one
+        siminet can be scored against all of them with a few vectorised
+        operations instead of one get_overlap_score call per row:
+            - indptr: row i is ids[indptr[i]:indptr[i + 1]].
+            - ids: concatenated (per row sorted) word ids.
+            - scores: concatenated confidence scores, aligned with ids.
+    """
+
+    __slots__ = ("indptr", "ids", "scores")
+
+    def __init__(self, siminets:list) -> None:
+        "Stacks 'siminets' (SimiNet or list format) into rows."
+        siminets = [to_siminet(siminet) for siminet in siminets]
+        self.indptr = np.zeros(len(siminets) + 1, dtype=np.int64)
+        np.cumsum([len(siminet) for siminet in siminets], out=self.indptr[1:])
+        if siminets:
+            self.ids = np.concatenate([siminet.ids for siminet in siminets])
+            self.scores = np.concatenate([siminet.scores for siminet in siminets])
+        else:
+            self.ids = np.empty(0, dtype=np.int32)
+            self.scores = np.empty(0, dtype=np.float64)
+
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+
+    def get_row_indexes(self) -> np.ndarray:
+        "Returns the row index of each entry in self.ids."
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+
+    def get_scores(self, new:SimiNet) -> np.ndarray:
+        """ Scores 'new' against every row, see get_overlap_score.
+            Returns a float64 array with one score per row. The sums
+            are done per row in id order, so each score is exactly what
+            get_overlap_score(new, row) gives.
+        """
+        row_count = len(self)
+        if not len(new.ids) or not len(self.ids): return np.zeros(row_count)
+        positions = np.searchsorted(new.ids, self.ids)
+        positions[positions == len(new.ids)] = 0
+        matched = new.ids[positions] == self.ids
+        pair_scores = new.scores[positions[matched]] + self.scores[matched]
+        # // bincount adds weights in entry order, i.e. sequentially per row.
+        return np.bincount(
+            self.get_row_indexes()[matched],
+            weights=pair_scores,
+            minlength=row_count
+        )
+
+
+    def get_pairwise_scores(self) -> np.ndarray:
+        """ Scores every row against every other row, see get_overlap_score.
+            Returns a symmetric (rows x rows) float64 matrix; the diagonal
+            is 0. With S the rows as a sparse (rows x vocab) score matrix
+            and I the same with 1 for each word, S @ I.T holds, per pair,
+            the scores of one row on the words it shares with the other;
+            adding its transpose gives the overlap scores. Cost and memory
+            follow the shared words, not the (row, row, word) triples.
+            Sums are not in id order, so scores can differ from
+            get_overlap_score in the last bits.
+        """
+        row_count = len(self)
+        if not len(self.ids): return np.zeros((row_count, row_count))
+        shape = (row_count, int(self.ids.max()) + 1)
+        scores = sparse.csr_matrix((self.scores, self.ids, self.indptr), shape=shape)
+        indicators = sparse.csr_matrix(
+            (np.ones(len(self.ids)), self.ids, self.indptr), shape=shape
+        )
+        half = (scores @ indicators.T).toarray()
+        pairwise = half + half.T
+        np.fill_diagonal(pairwise, 0)
+        return pairwise